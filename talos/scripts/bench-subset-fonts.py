@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Benchmark for subset-fonts.py
+=============================
+Measures subsetting throughput without the proprietary UD_ShinGo/HMSans fonts.
+Synthetic CJK-sized fonts (CFF and glyf outlines, thousands of glyphs, a few GSUB
+features) are generated with fontTools' FontBuilder, then driven through
+`process_font` for each charset size and through `run_font_jobs` for each worker
+count. Wall time, throughput and peak memory are written to a JSON file; pass an
+earlier result with --compare to see the change between revisions.
+
+Requirements:
+    pip install fonttools brotli
+
+Usage:
+    python3 scripts/bench-subset-fonts.py --output bench.json
+    python3 scripts/bench-subset-fonts.py --compare bench.json
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import fontTools
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SUBSET_SCRIPT = SCRIPT_DIR / "subset-fonts.py"
+
+# Bump when the result layout or the synthetic fonts change, so old results aren't compared blindly.
+BENCH_VERSION = 1
+
+# Synthetic fonts cover ASCII, CJK punctuation and a run of CJK ideographs from U+4E00
+CJK_START = 0x4E00
+BASE_CODEPOINTS = list(range(0x20, 0x7F)) + list(range(0x3000, 0x3040))
+
+
+def parse_args():
+    parser = ArgumentParser(description="Benchmark subset-fonts.py on synthetic CJK-sized fonts.")
+    parser.add_argument(
+        "--glyphs",
+        type=int,
+        default=8000,
+        help="CJK ideographs per synthetic font (default: 8000).",
+    )
+    parser.add_argument(
+        "--charsets",
+        default="500,2000,6000",
+        help="Comma-separated charset sizes to subset to (default: 500,2000,6000).",
+    )
+    parser.add_argument(
+        "--workers",
+        default="1,2,4",
+        help="Comma-separated worker counts for the run_font_jobs benchmark (default: 1,2,4).",
+    )
+    parser.add_argument(
+        "--fonts",
+        type=int,
+        default=4,
+        help="Fonts per outline format in the run_font_jobs benchmark (default: 4).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Repetitions per process_font case; the fastest is kept (default: 3).",
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=None,
+        help="Directory for generated fonts and outputs, reused between runs (default: a temporary directory).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the results to this JSON file.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        default=None,
+        help="Earlier result JSON to compare against.",
+    )
+    return parser.parse_args()
+
+
+def load_subset_module(work_dir: Path):
+    """
+    Import subset-fonts.py and point its project paths at `work_dir`.
+    The module is registered in sys.modules so forked pool workers can unpickle its jobs.
+    """
+    spec = importlib.util.spec_from_file_location("subset_fonts", SUBSET_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    module.PROJECT_ROOT = work_dir
+    module.FONTS_DIR = work_dir / "src" / "assets" / "fonts"
+    module.ORIGINAL_FONTS_DIR = work_dir / "src" / "assets" / "fonts_original"
+    return module
+
+
+# --------- Synthetic fonts ----------
+def draw_glyph(pen, rnd: random.Random) -> None:
+    """Draw a stroke-heavy glyph: CJK ideographs average 10-20 contours of mixed lines and curves."""
+    for _ in range(rnd.randint(8, 20)):
+        x, y = rnd.randint(50, 850), rnd.randint(50, 850)
+        w, h = rnd.randint(20, 120), rnd.randint(20, 120)
+        pen.moveTo((x, y))
+        pen.lineTo((x + w, y))
+        if isinstance(pen, TTGlyphPen):
+            pen.qCurveTo((x + w + 20, y + h // 2), (x + w, y + h))
+        else:
+            pen.curveTo((x + w + 20, y + h // 3), (x + w + 20, y + 2 * h // 3), (x + w, y + h))
+        pen.lineTo((x, y + h))
+        pen.closePath()
+
+
+def build_synthetic_font(path: Path, cff: bool, glyph_count: int, seed: int) -> None:
+    """
+    Build a CJK-sized font with vertical and stylistic alternates for every tenth ideograph
+    (vert/salt) and a few ligatures (liga), so layout closure has real work to do.
+    """
+    rnd = random.Random(seed)
+    codepoints = BASE_CODEPOINTS + list(range(CJK_START, CJK_START + glyph_count))
+    cmap = {cp: f"uni{cp:04X}" for cp in codepoints}
+    alternates = [f"uni{cp:04X}" for cp in range(CJK_START, CJK_START + glyph_count, 10)]
+    names = [".notdef"] + list(cmap.values())
+    names += [f"{name}.vert" for name in alternates] + [f"{name}.salt" for name in alternates]
+    ligatures = [(f"uni{CJK_START + i:04X}", f"uni{CJK_START + i + 1:04X}") for i in range(0, min(glyph_count - 1, 200), 2)]
+    names += [f"{a}_{b}" for a, b in ligatures]
+
+    builder = FontBuilder(1000, isTTF=not cff)
+    builder.setupGlyphOrder(names)
+    builder.setupCharacterMap(cmap)
+    glyphs = {}
+    for name in names:
+        pen = T2CharStringPen(1000, None) if cff else TTGlyphPen(None)
+        draw_glyph(pen, rnd)
+        glyphs[name] = pen.getCharString() if cff else pen.glyph()
+    if cff:
+        builder.setupCFF("BenchSans", {"FullName": "Bench Sans"}, glyphs, {})
+    else:
+        builder.setupGlyf(glyphs)
+    builder.setupHorizontalMetrics({name: (1000, 0) for name in names})
+    builder.setupHorizontalHeader(ascent=880, descent=-120)
+    builder.setupNameTable({"familyName": "Bench Sans", "styleName": "Regular"})
+    builder.setupOS2(sTypoAscender=880, sTypoDescender=-120, usWinAscent=880, usWinDescent=120)
+    builder.setupPost()
+
+    features = [
+        "feature vert { " + " ".join(f"sub {name} by {name}.vert;" for name in alternates) + " } vert;",
+        "feature salt { " + " ".join(f"sub {name} by {name}.salt;" for name in alternates) + " } salt;",
+        "feature liga { " + " ".join(f"sub {a} {b} by {a}_{b};" for a, b in ligatures) + " } liga;",
+    ]
+    addOpenTypeFeaturesFromString(builder.font, "\n".join(features))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    builder.save(str(path))
+
+
+def ensure_fonts(subset_fonts, glyph_count: int, font_count: int) -> Dict[str, List[str]]:
+    """Generate (or reuse) `font_count` CFF and glyf fonts; returns font paths per outline format."""
+    fonts: Dict[str, List[str]] = {"cff": [], "glyf": []}
+    for outlines, suffix in (("cff", ".otf"), ("glyf", ".ttf")):
+        for index in range(font_count):
+            font_rel_path = f"Bench/BenchSans_{outlines}_{glyph_count}_{index}{suffix}"
+            path = subset_fonts.ORIGINAL_FONTS_DIR / font_rel_path
+            if not path.is_file():
+                print(f"  Generating {font_rel_path}...")
+                build_synthetic_font(path, outlines == "cff", glyph_count, seed=index)
+            fonts[outlines].append(font_rel_path)
+    return fonts
+
+
+def charset_of(size: int, glyph_count: int) -> set:
+    """ASCII plus the first `size` ideographs (capped at the font's glyph count)."""
+    ideographs = range(CJK_START, CJK_START + min(size, glyph_count))
+    return {chr(cp) for cp in BASE_CODEPOINTS} | {chr(cp) for cp in ideographs}
+
+
+# --------- Benchmarks ----------
+def bench_process_font(subset_fonts, fonts: Dict[str, List[str]], charset_sizes: List[int],
+                       glyph_count: int, repeat: int) -> List[Dict[str, Any]]:
+    """Time one in-process process_font call per outline format and charset size (fastest of `repeat`)."""
+    results = []
+    for outlines, font_paths in fonts.items():
+        font_rel_path = font_paths[0]
+        for size in charset_sizes:
+            characters = charset_of(size, glyph_count)
+            best: Optional[Dict[str, Any]] = None
+            for _ in range(max(1, repeat)):
+                metrics: Dict[str, Any] = {}
+                subset_fonts.reset_peak_rss()
+                started = time.perf_counter()
+                subset_fonts.process_font(font_rel_path, characters, log=lambda _: None, metrics=metrics)
+                wall = time.perf_counter() - started
+                if best is None or wall < best["wall_seconds"]:
+                    best = {
+                        "wall_seconds": wall,
+                        "peak_rss": subset_fonts.peak_rss_bytes(),
+                        "glyphs_after": metrics.get("glyphs_after"),
+                        "woff2_bytes": metrics.get("bytes", {}).get("woff2"),
+                        "stages": metrics.get("seconds", {}),
+                    }
+            results.append({
+                "benchmark": "process_font",
+                "outlines": outlines,
+                "glyphs": glyph_count,
+                "characters": len(characters),
+                **best,
+                "characters_per_second": len(characters) / best["wall_seconds"],
+            })
+            print(f"  process_font {outlines:<4} {len(characters):>6} chars: {best['wall_seconds']:.2f}s "
+                  f"({len(characters) / best['wall_seconds']:.0f} chars/s, "
+                  f"peak {subset_fonts.format_size(best['peak_rss'] or 0)})")
+    return results
+
+
+def bench_run_font_jobs(subset_fonts, fonts: Dict[str, List[str]], charset_size: int,
+                        glyph_count: int, worker_counts: List[int]) -> List[Dict[str, Any]]:
+    """Time run_font_jobs over every generated font (uncached) for each worker count."""
+    characters = charset_of(charset_size, glyph_count)
+    charsets = {"bench": {"characters": characters, "options": {}}}
+    jobs = [(font_rel_path, "bench") for font_paths in fonts.values() for font_rel_path in font_paths]
+    results = []
+    for workers in worker_counts:
+        manifest = {"version": subset_fonts.CACHE_VERSION, "fonts": {}}
+        stats = {"hits": 0, "misses": 0}
+        metrics: Dict[str, Any] = {}
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            subset_fonts.run_font_jobs(
+                "Benchmark", jobs, charsets, workers, manifest, stats,
+                use_cache=False, run_options={"metrics": True}, metrics=metrics,
+            )
+        wall = time.perf_counter() - started
+        peaks = [m["worker"]["peak_rss"] for m in metrics.values() if m.get("worker", {}).get("peak_rss")]
+        results.append({
+            "benchmark": "run_font_jobs",
+            "workers": workers,
+            "fonts": len(jobs),
+            "glyphs": glyph_count,
+            "characters": len(characters),
+            "wall_seconds": wall,
+            "fonts_per_second": len(jobs) / wall,
+            "peak_rss": max(peaks, default=None),
+            "cpu_seconds": sum(m.get("seconds", {}).get("total", 0) for m in metrics.values()),
+        })
+        print(f"  run_font_jobs {workers} worker(s), {len(jobs)} fonts: {wall:.2f}s "
+              f"({len(jobs) / wall:.2f} fonts/s, peak {subset_fonts.format_size(max(peaks, default=0))} per worker)")
+    return results
+
+
+# --------- Reporting ----------
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result: Dict[str, Any]) -> tuple:
+    """Identify a benchmark case across runs."""
+    return (result["benchmark"], result.get("outlines"), result.get("workers"), result["glyphs"], result["characters"])
+
+
+def compare_results(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print wall time and peak memory changes for every case present in both runs."""
+    if previous.get("version") != current["version"]:
+        print(f"⚠️  Comparing against bench format v{previous.get('version')} (current v{current['version']})")
+    before = {result_key(result): result for result in previous.get("results", [])}
+    print(f"\nCompared with {previous.get('revision') or 'previous run'}:")
+    for result in current["results"]:
+        old = before.get(result_key(result))
+        if not old:
+            continue
+        benchmark, outlines, workers, _, characters = result_key(result)
+        label = f"{benchmark} {outlines or f'{workers} worker(s)'} {characters} chars"
+        change = (result["wall_seconds"] / old["wall_seconds"] - 1) * 100
+        memory = ""
+        if result.get("peak_rss") and old.get("peak_rss"):
+            memory = f", peak RSS {(result['peak_rss'] / old['peak_rss'] - 1) * 100:+.1f}%"
+        print(f"  {label}: {old['wall_seconds']:.2f}s → {result['wall_seconds']:.2f}s ({change:+.1f}%){memory}")
+
+
+def main():
+    args = parse_args()
+    charset_sizes = [int(size) for size in args.charsets.split(",") if size.strip()]
+    worker_counts = [int(count) for count in args.workers.split(",") if count.strip()]
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Pool workers must inherit the redirected project paths of the loaded module
+        multiprocessing.set_start_method("fork", force=True)
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-fonts-")))
+        subset_fonts = load_subset_module(work_dir.resolve())
+        print("=" * 70)
+        print(f"subset-fonts.py benchmark ({args.glyphs} glyphs per font, work dir {work_dir})")
+        print("=" * 70)
+        fonts = ensure_fonts(subset_fonts, args.glyphs, max(1, args.fonts))
+
+        print("\nprocess_font:")
+        results = bench_process_font(subset_fonts, fonts, charset_sizes, args.glyphs, args.repeat)
+        print("\nrun_font_jobs:")
+        results += bench_run_font_jobs(subset_fonts, fonts, max(charset_sizes), args.glyphs, worker_counts)
+
+    report = {
+        "version": BENCH_VERSION,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "fonttools": fontTools.version,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "config": {
+            "glyphs": args.glyphs,
+            "charsets": charset_sizes,
+            "workers": worker_counts,
+            "fonts": args.fonts,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n📈 Results written to {args.output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
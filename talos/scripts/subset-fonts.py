@@ -6,27 +6,65 @@ This script subsets font files to only include characters used in locale JSON fi
 It processes UD_ShinGo and Harmony font families, creating optimized web fonts.
 
 Requirements:
-    pip install fonttools brotli
+    pip install "fonttools>=4.40,<5" brotli
 """
 
+import base64
+import copy
+import cProfile
+import hashlib
 import json
 import os
+import re
 import shutil
+import sys
+import time
 import unicodedata
+import zlib
 from argparse import ArgumentParser
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from array import array
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from fnmatch import fnmatch
+from io import BytesIO
 from pathlib import Path
-from typing import Callable, Optional, Set
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import brotli
+import fontTools
 from fontTools import subset
-from fontTools.ttLib import TTFont
+from fontTools.misc.timeTools import epoch_diff
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.hashPointPen import HashPointPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont, newTable
+
+try:
+    import resource  # POSIX only; used for worker peak RSS in --metrics
+except ImportError:
+    resource = None
 
 # Project root and paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 LOCALE_DATA_DIR = PROJECT_ROOT / "src" / "locale" / "data"
+LANGUAGE_PICKER_PATH = PROJECT_ROOT / "src" / "component" / "language" / "language.tsx"
 PUBLIC_FILES_DIR = PROJECT_ROOT / "public" / "files"
 FONTS_DIR = PROJECT_ROOT / "src" / "assets" / "fonts"
 ORIGINAL_FONTS_DIR = PROJECT_ROOT / "src" / "assets" / "fonts_original"
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "node_modules" / ".cache" / "subset-fonts"
+
+# Bump when the output pipeline changes in a way the subset options don't capture.
+CACHE_VERSION = 3
+# Bump when character extraction from JSON changes.
+CODEPOINT_CACHE_VERSION = 1
+# Bump when the cmap coverage bitmap format changes.
+COVERAGE_CACHE_VERSION = 1
+# Bump when per-glyph size tables for --estimate change.
+SIZE_TABLE_VERSION = 2
+# Glyphs Brotli-compressed together when building a size table, and the fixed-point
+# scale of the stored per-glyph byte counts.
+SIZE_TABLE_RUN = 64
+SIZE_TABLE_SCALE = 16
 
 # Font files to process
 UDSHINGO_FONTS = [
@@ -49,184 +87,1845 @@ HARMONY_FONTS = [
     "Harmony/HMSans_TC.ttf",
 ]
 
+# CSS family names per UD_ShinGo weight suffix, mirroring fontDefinitions in src/locale/fontLoader.ts
+UDSHINGO_FAMILIES = {
+    "B": "UD_ShinGo Bold",
+    "DB": "UD_ShinGo DemiBold",
+    "M": "UD_ShinGo Medium",
+    "R": "UD_ShinGo Regular",
+}
+
+SHARD_MANIFEST_PATH = FONTS_DIR / "shards.json"
+LOCALE_FONT_MANIFEST_PATH = FONTS_DIR / "locales.json"
+
+# Families the body text stacks in src/**/*.scss reach before any fallback; their
+# WOFF2 for a locale's region is what first paint needs, so only those get preload hints.
+FIRST_PAINT_FAMILIES = ("HMSans", "UD_ShinGo Regular")
+
+# OpenType features the app shapes with unless CSS asks for more (--layout-features overrides).
+# Browsers turn these on by default for horizontal text, plus the per-script shaping features
+# of complex scripts. Vertical forms (vert/vrt2/vkrn/...) are left out: no writing-mode uses them.
+DEFAULT_LAYOUT_FEATURES = [
+    "ccmp", "locl", "rvrn", "rlig", "liga", "clig", "calt", "rclt", "kern", "mark", "mkmk", "curs", "dist",
+    "abvf", "abvm", "abvs", "akhn", "blwf", "blwm", "blws", "cfar", "cjct", "fina", "fin2", "fin3",
+    "half", "haln", "init", "isol", "ljmo", "medi", "med2", "nukt", "pref", "pres", "pstf", "psts",
+    "rkrf", "rphf", "stch", "tjmo", "vatu", "vjmo", "ltra", "ltrm", "rtla", "rtlm",
+]
+
+# Features switched on by CSS font-variant-* keywords and vertical writing-mode values
+CSS_VARIANT_FEATURES: Dict[str, List[str]] = {
+    "common-ligatures": ["liga", "clig"],
+    "discretionary-ligatures": ["dlig"],
+    "historical-ligatures": ["hlig"],
+    "contextual": ["calt"],
+    "lining-nums": ["lnum"],
+    "oldstyle-nums": ["onum"],
+    "proportional-nums": ["pnum"],
+    "tabular-nums": ["tnum"],
+    "diagonal-fractions": ["frac", "numr", "dnom"],
+    "stacked-fractions": ["afrc"],
+    "ordinal": ["ordn"],
+    "slashed-zero": ["zero"],
+    "small-caps": ["smcp"],
+    "all-small-caps": ["smcp", "c2sc"],
+    "petite-caps": ["pcap"],
+    "all-petite-caps": ["pcap", "c2pc"],
+    "unicase": ["unic"],
+    "titling-caps": ["titl"],
+    "jis78": ["jp78"],
+    "jis83": ["jp83"],
+    "jis90": ["jp90"],
+    "jis04": ["jp04"],
+    "simplified": ["smpl"],
+    "traditional": ["trad"],
+    "full-width": ["fwid"],
+    "proportional-width": ["pwid"],
+    "ruby": ["ruby"],
+    "sub": ["subs"],
+    "super": ["sups"],
+    "vertical-rl": ["vert", "vrt2", "vkrn"],
+    "vertical-lr": ["vert", "vrt2", "vkrn"],
+}
+STYLESHEET_SUFFIXES = (".css", ".scss", ".sass", ".less")
+
+# Locale files (case-insensitive stems under src/locale/data/*/) whose text each font region renders.
+# Mirrors localeToFontRegion in src/locale/index.ts: zh-CN → CN, ja-JP → JP, everything else → HK.
+# "*" claims every locale not listed explicitly by another region. Override with --locale-routes.
+# The language picker's native names are shown in every locale, so they go to every region regardless.
+DEFAULT_LOCALE_ROUTES: Dict[str, List[str]] = {
+    "CN": ["zh-CN"],
+    "JP": ["ja-JP"],
+    "HK": ["zh-HK", "zh-TW", "*"],
+}
+
+# HMSans script variants map onto the region whose fonts load them (cnFiles/hkFiles in fontLoader.ts)
+SCRIPT_REGIONS = {"SC": "CN", "TC": "HK"}
+
+
+def parse_size(value: str) -> int:
+    """Parse a byte size such as 512M, 2G or 1048576."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = value.strip().upper().removesuffix("B").removesuffix("I")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise ValueError(f"invalid size: {value!r}") from None
+
+
+def parse_args():
+    parser = ArgumentParser(description="Subset project fonts to used locale characters.")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of fonts to process in parallel. Defaults to min(4, CPU count minus one).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory for the incremental build manifest. Defaults to node_modules/.cache/subset-fonts.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the incremental caches: re-extract every JSON file and re-subset every font.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        help="Split each font's WOFF2 into N unicode-range slices ranked by locale character frequency. "
+        "Writes <font>.shards.css per font plus src/assets/fonts/shards.json. 0 disables sharding.",
+    )
+    parser.add_argument(
+        "--region-deltas",
+        action="store_true",
+        help="Also split each UD_ShinGo weight into a shared base WOFF2 (glyphs identical across regions) "
+        "plus per-region deltas, with UD_ShinGo/UDShinGo_<region>.stack.css stacking them by unicode-range.",
+    )
+    parser.add_argument(
+        "--locale-routes",
+        type=Path,
+        default=None,
+        help='JSON file mapping font regions to locale file stems, e.g. {"CN": ["zh-CN"], "HK": ["zh-HK", "*"]}.',
+    )
+    parser.add_argument(
+        "--routing-report",
+        action="store_true",
+        help="Also build each font against the all-locale union in memory to report bytes saved by routing.",
+    )
+    parser.add_argument(
+        "--fallback-report",
+        action="store_true",
+        help="Only check cmap coverage: list locale strings (file and key path) with characters no font "
+        "of their region maps, which render with a system fallback font. Nothing is subset.",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Only predict each font's WOFF2 size from cached per-glyph compressed-size tables "
+        "(built once per source font) and check --budgets. Nothing is subset.",
+    )
+    parser.add_argument(
+        "--budgets",
+        type=Path,
+        default=None,
+        help='JSON file of per-font WOFF2 byte budgets, e.g. {"UD_ShinGo/*_CN_*.otf": "1.5M"}. '
+        "The run exits non-zero when a font (or its --estimate) is over budget.",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Try several WOFF2 encodings per font (hinting, subroutines, name table, CFF→glyf) "
+        "and keep the smallest valid one. Per-strategy sizes go to the cache manifest and --metrics.",
+    )
+    parser.add_argument(
+        "--layout-features",
+        default=None,
+        help="Comma-separated OpenType feature allowlist to keep (default: browser defaults). Features "
+        "enabled by font-feature-settings/font-variant-* in src stylesheets are added. '*' keeps every feature.",
+    )
+    parser.add_argument(
+        "--feature-report",
+        action="store_true",
+        help="Also build each font with every layout feature in memory to report the glyphs and bytes "
+        "the excluded features would cost.",
+    )
+    parser.add_argument(
+        "--verify-reproducible",
+        action="store_true",
+        help="Build every font twice (ignoring the cache) and fail unless all outputs are byte-identical.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After the initial run, keep watching src/locale/data and rebuild WOFF2 files when fonts gain characters.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        help="Polling interval in seconds for --watch (default: 0.5).",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=parse_size,
+        default=None,
+        help="Cap the summed estimated peak RSS of concurrently running font jobs, e.g. 2G or 512M. "
+        "Estimates come from each font's measured peak in the cache manifest.",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=None,
+        help="Write per-font stage timings, worker peak RSS, glyph counts and output sizes to this JSON file.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR / "profiles",
+        default=None,
+        help="Dump cProfile stats for every font job (one .prof per font and worker PID) into this directory.",
+    )
+    return parser.parse_args()
+
+
+def count_characters_from_json(json_path: Path) -> Counter:
+    """
+    Count every character occurrence in a JSON file (recursive).
+    All strings are NFC-normalized in one call, joined by a newline: a newline is a
+    non-composing starter, so normalization never reaches across string boundaries.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    strings: List[str] = []
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, str):
+            strings.append(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+
+    counts = Counter(unicodedata.normalize('NFC', "\n".join(strings)))
+    if len(strings) > 1:
+        counts["\n"] -= len(strings) - 1
+        if counts["\n"] <= 0:
+            del counts["\n"]
+    return counts
+
+
+def extract_codepoint_counts_job(json_path: str) -> Tuple[str, Optional[List[int]], Optional[List[int]], str]:
+    """Worker: return (path, sorted codepoints, counts, error) for one JSON file."""
+    try:
+        counts = count_characters_from_json(Path(json_path))
+    except Exception as e:
+        return json_path, None, None, str(e)
+    codepoints = sorted(ord(c) for c in counts)
+    return json_path, codepoints, [counts[chr(cp)] for cp in codepoints], ""
+
+
+def pack_ints(values: List[int]) -> str:
+    return base64.b64encode(array('I', values).tobytes()).decode('ascii')
+
+
+def unpack_ints(packed: str) -> List[int]:
+    values = array('I')
+    values.frombytes(base64.b64decode(packed))
+    return values.tolist()
+
+
+def load_codepoint_cache(cache_dir: Path) -> Dict[str, Any]:
+    cache_path = cache_dir / "codepoints.json"
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get("version") == CODEPOINT_CACHE_VERSION and isinstance(cache.get("files"), dict):
+            return cache
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"  ⚠️  Ignoring unreadable codepoint cache {cache_path}: {e}")
+    return {"version": CODEPOINT_CACHE_VERSION, "files": {}}
+
+
+def save_codepoint_cache(cache_dir: Path, cache: Dict[str, Any]) -> None:
+    # Drop entries for files that no longer exist
+    cache["files"] = {
+        rel: entry for rel, entry in cache["files"].items() if (PROJECT_ROOT / rel).is_file()
+    }
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_path = cache_dir / "codepoints.json"
+    temp_path = cache_path.with_suffix(".json.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, separators=(",", ":"), sort_keys=True)
+    os.replace(temp_path, cache_path)
+
+
+def scan_json_counts(
+    json_paths: List[Path],
+    cache: Dict[str, Any],
+    workers: int,
+) -> Dict[Path, Counter]:
+    """
+    Return per-file character counts for `json_paths`.
+    Files whose size/mtime match the cache are served from it without being opened;
+    files whose stat changed but content hash didn't are re-stamped; the rest are
+    extracted in a process pool and written back to the cache.
+    """
+    results: Dict[Path, Counter] = {}
+    misses: List[Path] = []
+
+    for json_path in json_paths:
+        rel = json_path.relative_to(PROJECT_ROOT).as_posix()
+        entry = cache["files"].get(rel)
+        stat = json_path.stat()
+        if entry and (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            if entry["size"] == stat.st_size and entry["sha256"] == hash_file(json_path):
+                entry["mtime_ns"] = stat.st_mtime_ns
+            else:
+                entry = None
+        if entry:
+            codepoints = unpack_ints(entry["codepoints"])
+            counts = unpack_ints(entry["counts"])
+            results[json_path] = Counter({chr(cp): n for cp, n in zip(codepoints, counts)})
+        else:
+            misses.append(json_path)
+
+    if misses:
+        paths = [str(path) for path in misses]
+        if workers > 1 and len(misses) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(misses))) as executor:
+                extracted = list(executor.map(extract_codepoint_counts_job, paths, chunksize=4))
+        else:
+            extracted = [extract_codepoint_counts_job(path) for path in paths]
+
+        for path_str, codepoints, counts, error in extracted:
+            json_path = Path(path_str)
+            rel = json_path.relative_to(PROJECT_ROOT).as_posix()
+            print(f"  Reading: {rel}")
+            if error:
+                # Not cached, so the file is retried next run
+                print(f"  ⚠️  Error reading {json_path}: {error}")
+                results[json_path] = Counter()
+                continue
+            stat = json_path.stat()
+            cache["files"][rel] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": hash_file(json_path),
+                "codepoints": pack_ints(codepoints),
+                "counts": pack_ints(counts),
+            }
+            results[json_path] = Counter({chr(cp): n for cp, n in zip(codepoints, counts)})
+
+    print(f"  {len(json_paths) - len(misses)} file(s) from cache, {len(misses)} extracted")
+    return results
+
+
+def find_json_files(root_dir: Path) -> List[Path]:
+    return sorted(
+        Path(root) / file
+        for root, dirs, files in os.walk(root_dir)
+        for file in files
+        if file.endswith('.json')
+    )
+
+
+def load_locale_routes(path: Optional[Path]) -> Dict[str, List[str]]:
+    """Load a region → locale stems mapping, falling back to DEFAULT_LOCALE_ROUTES."""
+    if path is None:
+        return DEFAULT_LOCALE_ROUTES
+    with open(path, 'r', encoding='utf-8') as f:
+        routes = json.load(f)
+    if not isinstance(routes, dict) or not all(isinstance(v, list) for v in routes.values()):
+        raise ValueError(f"{path}: expected an object of region → list of locale names")
+    return {region: [str(name) for name in names] for region, names in routes.items()}
+
+
+def route_locale_file(stem: str, routes: Dict[str, List[str]]) -> List[str]:
+    """Return the regions whose fonts render a locale file, by case-insensitive stem."""
+    stem = stem.lower()
+    explicit = [region for region, names in routes.items() if stem in (n.lower() for n in names)]
+    if explicit:
+        return explicit
+    return [region for region, names in routes.items() if "*" in names]
+
+
+def font_region(font_rel_path: str) -> Optional[str]:
+    """Region a font serves, from its file name (UDShinGo_CN_B → CN, HMSans_TC → HK)."""
+    for part in Path(font_rel_path).stem.split("_")[1:]:
+        if part in SCRIPT_REGIONS:
+            return SCRIPT_REGIONS[part]
+        if part in ("CN", "JP", "HK"):
+            return part
+    return None
+
+
+# Basic ASCII and common punctuation, always kept to ensure proper rendering
+BASIC_CHARS = set(' !"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~0123456789')
+BASIC_CHARS.update('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+def load_picker_labels(path: Path = LANGUAGE_PICKER_PATH) -> Dict[str, str]:
+    """
+    Native language names from LANG_LABEL_KEYS in the language picker, {locale: label}.
+    The picker lists every language in every locale, so these must be in every region's fonts.
+    """
+    try:
+        source = path.read_text(encoding='utf-8')
+    except OSError:
+        print(f"⚠️  {path.relative_to(PROJECT_ROOT)} not found — language picker labels not pinned")
+        return {}
+    block = re.search(r"LANG_LABEL_KEYS[^=]*=\s*\{(.*?)\};", source, re.S)
+    if block is None:
+        print(f"⚠️  LANG_LABEL_KEYS not found in {path.relative_to(PROJECT_ROOT)} — language picker labels not pinned")
+        return {}
+    return dict(re.findall(r"""['"]([^'"]+)['"]\s*:\s*['"]([^'"]*)['"]""", block.group(1)))
+
+
+def merge_locale_counts(
+    file_counts: Dict[Path, Counter],
+    routes: Dict[str, List[str]],
+    frequencies: Optional[Counter] = None,
+    always_chars: Iterable[str] = (),
+) -> Tuple[Set[str], Dict[str, Set[str]]]:
+    """
+    Fold per-file counts into (union of all locales, {region: characters routed to it}).
+    `always_chars` (e.g. the language picker labels) is added to every region.
+    """
+    region_chars: Dict[str, Set[str]] = {region: set() for region in routes}
+    all_chars = set()
+    for json_path, counts in file_counts.items():
+        all_chars.update(counts)
+        for region in route_locale_file(json_path.stem, routes):
+            region_chars[region].update(counts)
+        if frequencies is not None:
+            frequencies.update(counts)
+
+    pinned = BASIC_CHARS.union(always_chars)
+    all_chars.update(pinned)
+    for chars in region_chars.values():
+        chars.update(pinned)
+    return all_chars, region_chars
+
+
+def collect_locale_characters(
+    frequencies: Optional[Counter] = None,
+    routes: Optional[Dict[str, List[str]]] = None,
+    cache: Optional[Dict[str, Any]] = None,
+    workers: int = 1,
+) -> Tuple[Set[str], Dict[str, Set[str]]]:
+    """
+    Collect characters from locale JSON files (used for UD_ShinGo + base set).
+    Returns (union of all locales, {region: characters of the locales routed to it}).
+    When `frequencies` is given it is updated with per-character occurrence counts.
+    """
+    print("📖 Collecting characters from locale files...")
+    routes = routes or DEFAULT_LOCALE_ROUTES
+    cache = cache if cache is not None else {"files": {}}
+
+    # Walk through all JSON files in locale/data
+    file_counts = scan_json_counts(find_json_files(LOCALE_DATA_DIR), cache, workers)
+    picker_chars = "".join(load_picker_labels().values())
+    all_chars, region_chars = merge_locale_counts(file_counts, routes, frequencies, picker_chars)
+
+    print(f"\n✅ Collected {len(all_chars)} unique locale characters")
+    for region, chars in region_chars.items():
+        print(f"   {region}: {len(chars)} characters")
+    return all_chars, region_chars
+
+
+def resolve_font_characters(
+    font_rel_path: str,
+    include_files: bool,
+    locale_chars: Set[str],
+    region_chars: Dict[str, Set[str]],
+    files_chars: Set[str],
+) -> Tuple[str, Set[str]]:
+    """Return (charset ID, characters) for a font: its region's locales, plus public/files for HMSans."""
+    region = font_region(font_rel_path)
+    region_key = region if region in region_chars else "*"
+    chars = set(region_chars[region_key]) if region_key in region_chars else set(locale_chars)
+    if include_files:
+        chars.update(files_chars)
+    return (f"{region_key}+files" if include_files else region_key), chars
+
+
+def collect_public_files_characters(cache: Optional[Dict[str, Any]] = None, workers: int = 1) -> Set[str]:
+    """
+    Collect characters from public/files (archive JSON/HTML, etc.).
+    Used only for HMSans subsetting — not merged into UD_ShinGo.
+    """
+    chars: Set[str] = set()
+    if not PUBLIC_FILES_DIR.is_dir():
+        print("📂 public/files not found — skipping extra HMSans character scan")
+        return chars
+
+    print("📖 Collecting characters from public/files (HMSans only)...")
+    cache = cache if cache is not None else {"files": {}}
+    for counts in scan_json_counts(find_json_files(PUBLIC_FILES_DIR), cache, workers).values():
+        chars.update(counts)
+
+    print(f"✅ Collected {len(chars)} unique characters from public/files")
+    return chars
+
+
+def build_subset_options(flavor: Optional[str], layout_features: Optional[List[str]] = None) -> subset.Options:
+    """
+    Build the subsetter options used for a given output flavor (None keeps the source format).
+    `layout_features` limits GSUB/GPOS to those feature tags; None keeps every feature.
+    """
+    options = subset.Options()
+    options.flavor = flavor
+    if flavor in ('woff', 'woff2'):
+        options.desubroutinize = True
+    options.layout_features = list(layout_features) if layout_features is not None else ['*']
+    options.name_IDs = ['*']  # Keep all name records
+    options.name_legacy = True
+    options.name_languages = ['*']
+    options.legacy_kern = True
+    options.symbol_cmap = True
+    options.layout_closure = True
+    options.prune_unicode_ranges = True
+    options.recalc_bounds = True
+    options.recalc_timestamp = False  # Keep head.modified stable so unchanged fonts keep their hashed URLs
+    options.canonical_order = True
+    return options
+
+
+def open_font(source: Any, lazy: Optional[bool] = None) -> TTFont:
+    """
+    Open a font with the pipeline's recalc settings (head.modified is never refreshed on save).
+    `lazy=True` defers table and glyph decompilation until the subsetter touches them.
+    """
+    options = build_subset_options(None)
+    return TTFont(
+        source, recalcBBoxes=options.recalc_bounds, recalcTimestamp=options.recalc_timestamp, lazy=lazy
+    )
+
+
+def pin_timestamp(font: TTFont) -> None:
+    """
+    Make head.modified reproducible: SOURCE_DATE_EPOCH when set, otherwise the source
+    font's own value (left untouched). head.created is kept as-is either way.
+    """
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch and "head" in font:
+        font["head"].modified = int(epoch) - epoch_diff
+
+
+def desubroutinize_font(font: TTFont) -> None:
+    """Inline CFF subroutines in place (no-op for TrueType outlines)."""
+    for tag in ('CFF ', 'CFF2'):
+        if tag in font:
+            font[tag].cff.desubroutinize()
+
+
+def closure_fingerprint(font: TTFont, characters: Set[str], layout_features: Optional[List[str]]) -> str:
+    """
+    Fingerprint everything the cmap/GSUB glyph closure depends on: the raw cmap, GSUB and MATH
+    tables, the glyph count, the requested codepoints and kept features. Sibling weights with
+    the same fingerprint close over the same glyph IDs, so one closure serves all of them.
+    """
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{len(font.getGlyphOrder())}:".encode('ascii'))
+    for tag in ("cmap", "GSUB", "MATH"):
+        digest.update(tag.encode('ascii'))
+        if font.reader is not None and tag in font.reader:
+            digest.update(font.reader[tag])
+    digest.update(hash_codepoints(characters).encode('ascii'))
+    digest.update(json.dumps(sorted(layout_features) if layout_features is not None else "*").encode('utf-8'))
+    return digest.hexdigest()
+
+
+def source_closure_fingerprint(font_rel_path: str, characters: Set[str], layout_features: Optional[List[str]]) -> Optional[str]:
+    """closure_fingerprint of a font's source file, or None when the source is missing."""
+    source_path = font_source_path(font_rel_path)
+    if source_path is None:
+        return None
+    font = open_font(str(source_path), lazy=True)
+    try:
+        return closure_fingerprint(font, characters, layout_features)
+    finally:
+        font.close()
+
+
+def load_closure(closure_dir: Optional[str], fingerprint: str) -> Optional[List[int]]:
+    """Glyph IDs of a GSUB closure a sibling already computed, or None."""
+    if not closure_dir:
+        return None
+    try:
+        return unpack_ints((Path(closure_dir) / f"{fingerprint}.gids").read_text(encoding='ascii'))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_closure(closure_dir: str, fingerprint: str, glyph_ids: List[int]) -> None:
+    path = Path(closure_dir) / f"{fingerprint}.gids"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_text(pack_ints(sorted(glyph_ids)), encoding='ascii')
+    os.replace(temp_path, path)
+
+
+# Subsetter.subset() is exactly these private stages; run_subset_stages replays them one by one to
+# time the glyph closure separately and to reuse a sibling font's GSUB closure. Only done on fontTools
+# versions in STAGED_FONTTOOLS_RANGE whose subset() still matches, otherwise the public subset() runs.
+SUBSET_STAGES = ("_prune_pre_subset", "_closure_glyphs", "_subset_glyphs", "_prune_post_subset")
+STAGED_FONTTOOLS_RANGE = ((4, 40), (5, 0))
+
+
+def staged_subset_supported() -> bool:
+    version = tuple(int(part) for part in re.findall(r"\d+", fontTools.version)[:2])
+    low, high = STAGED_FONTTOOLS_RANGE
+    stages = getattr(subset.Subsetter.subset, "__code__", None)
+    return low <= version < high and stages is not None and stages.co_names == SUBSET_STAGES
+
+
+STAGED_SUBSET = staged_subset_supported()
+
+
+def run_subset_stages(
+    subsetter: subset.Subsetter,
+    font: TTFont,
+    timings: Dict[str, Any],
+    reused_closure: Optional[List[int]] = None,
+) -> Optional[List[int]]:
+    """
+    Run `subsetter.subset(font)`, recording "closure" and "subset" seconds in `timings`.
+    `reused_closure` (glyph IDs from load_closure) replaces the GSUB closure walk.
+    Returns the source glyph IDs after the GSUB closure, for save_closure. Returns None when the
+    stages could not be split: the public subset() ran as a whole, everything is timed as
+    "subset" and no closure was reused.
+    """
+    if not STAGED_SUBSET:
+        started = time.perf_counter()
+        subsetter.subset(font)
+        timings["subset"] = time.perf_counter() - started
+        return None
+
+    started = time.perf_counter()
+    subsetter._prune_pre_subset(font)
+    gsub = font["GSUB"] if subsetter.options.layout_closure and "GSUB" in font else None
+    if gsub is not None and reused_closure is not None:
+        # Same cmap/GSUB/charset as a sibling: replay its result instead of walking the lookups
+        glyph_order = font.getGlyphOrder()
+        reused_glyphs = [glyph_order[gid] for gid in reused_closure]
+        gsub.closure_glyphs = lambda s: s.glyphs.update(reused_glyphs)
+    try:
+        subsetter._closure_glyphs(font)
+    finally:
+        if gsub is not None:
+            gsub.__dict__.pop("closure_glyphs", None)
+    # Glyph IDs are only meaningful in the source glyph order, so read them before subsetting
+    glyph_ids = font.getReverseGlyphMap()
+    closure = [glyph_ids[name] for name in subsetter.glyphs_gsubed]
+    timings["closure"] = time.perf_counter() - started
+    started = time.perf_counter()
+    subsetter._subset_glyphs(font)
+    subsetter._prune_post_subset(font)
+    timings["subset"] = time.perf_counter() - started
+    return closure
+
+
+def subset_font_flavors(
+    input_path: Path,
+    characters: Set[str],
+    metrics: Optional[Dict[str, Any]] = None,
+    layout_features: Optional[List[str]] = None,
+    closure_dir: Optional[str] = None,
+) -> Dict[Optional[str], bytes]:
+    """
+    Subset a font once and serialize every output flavor from memory.
+    Returns {None: source format, 'woff': ..., 'woff2': ...}.
+    The glyph closure is computed a single time; the web flavors are
+    desubroutinized from the already-subset font instead of re-subsetting.
+    The source is opened lazily and released right after the first save, so
+    only the small subset stays in memory while the web flavors are written.
+    With `closure_dir`, the GSUB closure is shared through that directory between sibling
+    fonts with the same closure_fingerprint: the first computes it, the others reuse it.
+    When `metrics` is given, per-stage timings, glyph counts and sizes are recorded in it.
+    """
+    options = build_subset_options(None, layout_features)
+    web_options = build_subset_options('woff2', layout_features)
+    timings: Dict[str, Any] = {}
+
+    # Convert characters set to Unicode codepoints (integers)
+    unicodes = [ord(c) for c in characters]
+
+    started = time.perf_counter()
+    font = open_font(str(input_path), lazy=True)
+    pin_timestamp(font)
+    glyphs_before = len(font.getGlyphOrder())
+    timings["load"] = time.perf_counter() - started
+    try:
+        subsetter = subset.Subsetter(options=options)
+        subsetter.populate(unicodes=unicodes)
+        fingerprint = closure_fingerprint(font, characters, layout_features) if closure_dir and STAGED_SUBSET else None
+        reused = load_closure(closure_dir, fingerprint) if fingerprint else None
+        has_gsub = options.layout_closure and "GSUB" in font
+        closure = run_subset_stages(subsetter, font, timings, reused)
+        staged = closure is not None
+        if staged and has_gsub and fingerprint and reused is None:
+            save_closure(closure_dir, fingerprint, closure)
+
+        glyphs_after = len(font.getGlyphOrder())
+
+        outputs: Dict[Optional[str], bytes] = {}
+        serialize: Dict[str, float] = {}
+        started = time.perf_counter()
+        buffer = BytesIO()
+        font.save(buffer)
+        outputs[None] = buffer.getvalue()
+        serialize["source"] = time.perf_counter() - started
+    finally:
+        # Drop the source font (file reader, lazily loaded tables) before the web flavors
+        font.close()
+
+    # Only CFF outlines differ between the source and web flavors. Desubroutinizing does not move
+    # any outline, so the bounds computed by the first save are kept instead of redrawing every glyph.
+    started = time.perf_counter()
+    web_sfnt = outputs[None]
+    if web_options.desubroutinize:
+        font = open_font(BytesIO(outputs[None]), lazy=True)
+        try:
+            if "CFF " in font or "CFF2" in font:
+                font.recalcBBoxes = False
+                desubroutinize_font(font)
+                buffer = BytesIO()
+                font.save(buffer)
+                web_sfnt = buffer.getvalue()
+        finally:
+            font.close()
+    timings["desubroutinize"] = time.perf_counter() - started
+
+    # WOFF/WOFF2 only re-wrap the tables, so copy them raw instead of decompiling and recompiling
+    for flavor in ('woff', 'woff2'):
+        started = time.perf_counter()
+        outputs[flavor] = reflavor_font(web_sfnt, flavor)
+        serialize[flavor] = time.perf_counter() - started
+    timings["serialize"] = serialize
+
+    if metrics is not None:
+        metrics["seconds"] = timings
+        metrics["closure_reused"] = staged and reused is not None and has_gsub
+        metrics["glyphs_before"] = glyphs_before
+        metrics["glyphs_after"] = glyphs_after
+        metrics["bytes"] = {("source" if flavor is None else flavor): len(data) for flavor, data in outputs.items()}
+    return outputs
+
+
+def reflavor_font(sfnt: bytes, flavor: str) -> bytes:
+    """Wrap an already-compiled sfnt as WOFF/WOFF2 without decompiling its tables."""
+    font = open_font(BytesIO(sfnt), lazy=True)
+    try:
+        font.recalcBBoxes = False
+        font.flavor = flavor
+        buffer = BytesIO()
+        font.save(buffer)
+        return buffer.getvalue()
+    finally:
+        font.close()
+
+
+# --------- Layout feature analysis ----------
+def collect_css_features(root_dir: Path) -> Dict[str, Set[str]]:
+    """
+    Feature tags the app's stylesheets switch on, mapped to the files that use them.
+    Reads font-feature-settings tags (unless set to 0/off), font-variant-* keywords and
+    vertical writing-mode values.
+    """
+    found: Dict[str, Set[str]] = {}
+    if not root_dir.is_dir():
+        return found
+    for path in sorted(root_dir.rglob("*")):
+        if path.suffix not in STYLESHEET_SUFFIXES or not path.is_file():
+            continue
+        text = path.read_text(encoding='utf-8', errors='replace')
+        rel_path = path.relative_to(PROJECT_ROOT).as_posix()
+        tags: Set[str] = set()
+        for match in re.finditer(r"font-feature-settings\s*:([^;}]*)", text):
+            for tag, value in re.findall(r"[\"']([\w ]{4})[\"']\s*(\w*)", match.group(1)):
+                if value.lower() not in ("0", "off"):
+                    tags.add(tag)
+        for match in re.finditer(r"(?:font-variant(?:-[a-z]+)?|writing-mode)\s*:([^;}]*)", text):
+            for keyword in re.findall(r"[a-z0-9-]+", match.group(1).lower()):
+                tags.update(CSS_VARIANT_FEATURES.get(keyword, ()))
+        for tag in tags:
+            found.setdefault(tag, set()).add(rel_path)
+    return found
+
+
+def resolve_layout_features(allowlist: Optional[str]) -> Optional[List[str]]:
+    """
+    Final feature list for the subsetter: the allowlist (DEFAULT_LAYOUT_FEATURES unless given)
+    plus every feature enabled in src stylesheets. Returns None when '*' keeps all features.
+    """
+    if allowlist is not None and allowlist.strip() == "*":
+        print("🔠 Layout features: keeping every feature ('*')")
+        return None
+    base = DEFAULT_LAYOUT_FEATURES if allowlist is None else [t.strip() for t in allowlist.split(",") if t.strip()]
+    css_features = collect_css_features(PROJECT_ROOT / "src")
+    added = sorted(set(css_features) - set(base))
+    print(f"🔠 Layout features: {len(base)} from the allowlist, {len(added)} added by CSS"
+          + (f" ({', '.join(added)})" if added else ""))
+    return sorted(set(base) | set(css_features))
+
+
+def font_feature_tags(font: TTFont) -> Set[str]:
+    """All GSUB/GPOS feature tags a font defines."""
+    tags: Set[str] = set()
+    for table_tag in ("GSUB", "GPOS"):
+        if table_tag in font:
+            feature_list = font[table_tag].table.FeatureList
+            if feature_list:
+                tags.update(record.FeatureTag for record in feature_list.FeatureRecord)
+    return tags
+
+
+# --------- WOFF2 optimizer ----------
+# Strategy axes tried by --optimize, greedily in this order; the first value is the default pipeline.
+WOFF2_STRATEGY_AXES = [
+    ("outlines", ["cff-desubr", "cff-subr", "glyf"]),  # CFF sources only
+    ("hinting", ["keep", "strip"]),
+    ("names", ["all", "trimmed"]),
+]
+
+
+def convert_cff_to_glyf(font: TTFont, max_err: float = 1.0) -> None:
+    """
+    Replace CFF outlines with quadratic glyf outlines in place, so WOFF2 can apply
+    its glyf/loca transform. Same approach as fontTools' otf2ttf snippet.
+    """
+    glyph_order = font.getGlyphOrder()
+    glyph_set = font.getGlyphSet()
+    glyf = newTable("glyf")
+    glyf.glyphOrder = glyph_order
+    glyf.glyphs = {}
+    for name in glyph_order:
+        pen = TTGlyphPen(glyph_set)
+        glyph_set[name].draw(Cu2QuPen(pen, max_err, reverse_direction=True))
+        glyf[name] = pen.glyph()
+
+    font["loca"] = newTable("loca")
+    font["glyf"] = glyf
+    del font["CFF "]
+    if "VORG" in font:
+        del font["VORG"]
+
+    maxp = newTable("maxp")
+    maxp.tableVersion = 0x00010000
+    for field in ("maxZones", "maxTwilightPoints", "maxStorage", "maxFunctionDefs", "maxInstructionDefs",
+                  "maxStackElements", "maxSizeOfInstructions", "maxComponentElements"):
+        setattr(maxp, field, 0)
+    maxp.maxZones = 1
+    maxp.numGlyphs = len(glyph_order)
+    font["maxp"] = maxp
+
+    post = font["post"]
+    post.formatType = 2.0
+    post.extraNames = []
+    post.mapping = {}
+    post.glyphOrder = glyph_order
+    font["head"].glyphDataFormat = 0
+    font.sfntVersion = "\x00\x01\x00\x00"
+
+
+def build_woff2_variant(subset_bytes: bytes, strategy: Dict[str, str]) -> bytes:
+    """Re-encode an in-memory subset as WOFF2 under one optimizer strategy."""
+    font = open_font(BytesIO(subset_bytes))
+    try:
+        if strategy["hinting"] == "strip" or strategy["names"] == "trimmed":
+            # Re-subsetting to the same cmap is cheap and reuses fontTools' own hint/name pruning
+            options = build_subset_options(None)
+            options.hinting = strategy["hinting"] != "strip"
+            if strategy["names"] == "trimmed":
+                options.name_IDs = [0, 1, 2, 3, 4, 5, 6]
+                options.name_legacy = False
+                options.name_languages = [0x0409]
+            subsetter = subset.Subsetter(options=options)
+            subsetter.populate(unicodes=list((font.getBestCmap() or {}).keys()))
+            subsetter.subset(font)
+
+        outlines = strategy.get("outlines")
+        if outlines == "cff-desubr":
+            desubroutinize_font(font)
+        elif outlines == "glyf":
+            convert_cff_to_glyf(font)
+
+        font.flavor = 'woff2'
+        buffer = BytesIO()
+        font.save(buffer)
+        return buffer.getvalue()
+    finally:
+        font.close()
+
+
+def woff2_is_valid(data: bytes, expected_cmap: Dict[int, str], expected_glyphs: int) -> bool:
+    """A variant is valid if it decodes and keeps the same cmap and glyph count."""
+    try:
+        font = TTFont(BytesIO(data))
+        try:
+            return font.getBestCmap() == expected_cmap and len(font.getGlyphOrder()) == expected_glyphs
+        finally:
+            font.close()
+    except Exception:
+        return False
+
+
+def optimize_woff2(subset_bytes: bytes, default_woff2: bytes) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Try WOFF2 strategies greedily, one axis at a time, and keep the smallest valid output.
+    Returns (best bytes, report) where the report lists every tried strategy's size.
+    """
+    font = TTFont(BytesIO(subset_bytes))
+    is_cff = "CFF " in font
+    expected_cmap = font.getBestCmap() or {}
+    expected_glyphs = len(font.getGlyphOrder())
+    font.close()
+
+    best = {axis: values[0] for axis, values in WOFF2_STRATEGY_AXES}
+    if not is_cff:
+        best.pop("outlines")
+    best_bytes = default_woff2
+    tried: Dict[str, Optional[int]] = {}
+
+    def label(strategy: Dict[str, str]) -> str:
+        return ",".join(f"{axis}={value}" for axis, value in strategy.items())
+
+    tried[label(best)] = len(default_woff2)
+    for axis, values in WOFF2_STRATEGY_AXES:
+        if axis not in best:
+            continue
+        for value in values[1:]:
+            candidate = dict(best, **{axis: value})
+            try:
+                data = build_woff2_variant(subset_bytes, candidate)
+            except Exception:
+                tried[label(candidate)] = None
+                continue
+            valid = woff2_is_valid(data, expected_cmap, expected_glyphs)
+            tried[label(candidate)] = len(data) if valid else None
+            if valid and len(data) < len(best_bytes):
+                best, best_bytes = candidate, data
+
+    report = {
+        "default": len(default_woff2),
+        "chosen": label(best),
+        "bytes": len(best_bytes),
+        "saved": len(default_woff2) - len(best_bytes),
+        "strategies": tried,
+    }
+    return best_bytes, report
+
+
+# --------- Shared base + region deltas ----------
+def subset_to_woff2(source_path: Path, codepoints: Iterable[int], layout_features: Optional[List[str]] = None) -> bytes:
+    """Subset a source font straight to WOFF2 (no other flavor)."""
+    font = open_font(str(source_path), lazy=True)
+    pin_timestamp(font)
+    try:
+        subsetter = subset.Subsetter(options=build_subset_options('woff2', layout_features))
+        subsetter.populate(unicodes=sorted(codepoints))
+        subsetter.subset(font)
+        font.flavor = 'woff2'
+        buffer = BytesIO()
+        font.save(buffer)
+        return buffer.getvalue()
+    finally:
+        font.close()
+
+
+def outline_digests(source_path: Path, codepoints: Iterable[int]) -> Dict[int, str]:
+    """Hash each codepoint's glyph outline and advance width (HashPointPen), for codepoints the cmap maps."""
+    font = TTFont(str(source_path), lazy=True)
+    try:
+        cmap = font.getBestCmap() or {}
+        glyph_set = font.getGlyphSet()
+        digests = {}
+        for cp in codepoints:
+            if cp not in cmap:
+                continue
+            glyph = glyph_set[cmap[cp]]
+            pen = HashPointPen(glyph.width, glyph_set)
+            glyph.drawPoints(pen)
+            digests[cp] = pen.hash
+        return digests
+    finally:
+        font.close()
+
+
+def shared_codepoints(
+    region_codepoints: Dict[str, Set[int]],
+    digests: Dict[str, Dict[int, str]],
+    base_region: str,
+) -> Dict[str, Set[int]]:
+    """
+    Per region, the codepoints it can take from the shared base: those drawn exactly like the
+    base region's glyph, kept only when at least two regions need that same glyph.
+    """
+    matches: Dict[int, List[str]] = {}
+    for region, codepoints in region_codepoints.items():
+        for cp in codepoints:
+            base_digest = digests[base_region].get(cp)
+            if base_digest is not None and digests[region].get(cp) == base_digest:
+                matches.setdefault(cp, []).append(region)
+    shared: Dict[str, Set[int]] = {region: set() for region in region_codepoints}
+    for cp, regions in matches.items():
+        if len(regions) >= 2:
+            for region in regions:
+                shared[region].add(cp)
+    return shared
+
+
+def build_region_deltas_job(
+    weight: str,
+    sources: Dict[str, str],
+    region_codepoints: Dict[str, List[int]],
+    layout_features: Optional[List[str]],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Split one UD_ShinGo weight into a shared base WOFF2 and per-region delta WOFF2s.
+    `sources` maps region → source font path; returns (weight, entry) with the written files.
+    Each region's CSS claims only the base codepoints its own font draws identically, so a
+    region whose outlines differ (e.g. TrueType HK vs CFF CN/JP) simply keeps them in its delta.
+    Codepoints a region's source font does not map are left out of its base and delta ranges.
+    """
+    codepoints = {region: set(cps) for region, cps in region_codepoints.items()}
+    digests = {
+        region: outline_digests(Path(source), codepoints[region] | set().union(*codepoints.values()))
+        for region, source in sources.items()
+    }
+    # Digests only cover mapped codepoints; drop the rest so unicode-range never over-claims
+    codepoints = {region: cps & digests[region].keys() for region, cps in codepoints.items()}
+    base_region = next(iter(sources))
+    region_shared = shared_codepoints(codepoints, digests, base_region)
+    shared = set().union(*region_shared.values())
+
+    output_dir = FONTS_DIR / "UD_ShinGo"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    def write(name: str, source: str, cps: Set[int]) -> Dict[str, Any]:
+        data = subset_to_woff2(Path(source), cps, layout_features)
+        path = output_dir / name
+        path.write_bytes(data)
+        written.append(path)
+        return {
+            "file": path.relative_to(FONTS_DIR).as_posix(),
+            "unicodeRange": format_unicode_range(cps),
+            "codepoints": len(cps),
+            "bytes": len(data),
+        }
+
+    entry: Dict[str, Any] = {"base": write(f"UDShinGo_base_{weight}.woff2", sources[base_region], shared), "deltas": {}}
+    entry["base"]["ranges"] = {region: format_unicode_range(cps) for region, cps in region_shared.items() if cps}
+    for region, source in sources.items():
+        delta = codepoints[region] - region_shared[region]
+        entry["deltas"][region] = write(f"UDShinGo_delta_{region}_{weight}.woff2", source, delta)
+    entry["outputs"] = describe_outputs(written)
+    return weight, entry
+
+
+def render_stack_css(region: str, deltas: Dict[str, Dict[str, Any]]) -> str:
+    """
+    One region's @font-face rules: per weight, the shared base (same URL for every region,
+    so it is downloaded and cached once) stacked with the region's delta by unicode-range.
+    """
+    blocks = []
+    for weight, entry in deltas.items():
+        family = UDSHINGO_FAMILIES[weight]
+        delta = entry["deltas"][region]
+        parts = [(entry["base"]["file"], entry["base"]["ranges"].get(region)), (delta["file"], delta["unicodeRange"])]
+        for file, unicode_range in parts:
+            if not unicode_range:
+                continue
+            blocks.append(
+                "@font-face {\n"
+                f"  font-family: '{family}';\n"
+                "  font-style: normal;\n"
+                "  font-weight: normal;\n"
+                "  font-display: swap;\n"
+                f"  src: url('./{Path(file).name}') format('woff2');\n"
+                f"  unicode-range: {unicode_range};\n"
+                "}"
+            )
+    return "\n\n".join(blocks) + "\n"
+
+
+def build_region_deltas(
+    manifest: Dict[str, Any],
+    charsets: Dict[str, Dict[str, Any]],
+    jobs: List[Tuple[str, str]],
+    layout_features: Optional[List[str]],
+    workers: int,
+    use_cache: bool = True,
+) -> None:
+    """
+    Build shared-base + region-delta WOFF2s for every UD_ShinGo weight and one stacking CSS per
+    region (UD_ShinGo/UDShinGo_<region>.stack.css). Weights whose sources, charsets and options
+    are unchanged are served from manifest["deltas"].
+    """
+    print("\n" + "=" * 70)
+    print("Splitting UD_ShinGo into a shared base + per-region deltas")
+    print("=" * 70)
+    charset_by_font = dict(jobs)
+    options_hash = hash_subset_options({"layout_features": sorted(layout_features) if layout_features is not None else None})
+    cached = manifest.setdefault("deltas", {})
+    pending = []
+    for weight in UDSHINGO_FAMILIES:
+        sources: Dict[str, str] = {}
+        region_codepoints: Dict[str, List[int]] = {}
+        key_parts = [options_hash]
+        for font_rel_path in UDSHINGO_FONTS:
+            region = font_region(font_rel_path)
+            source_path = font_source_path(font_rel_path)
+            if not Path(font_rel_path).stem.endswith(f"_{weight}") or region is None or source_path is None:
+                continue
+            characters = charsets[charset_by_font[font_rel_path]]["characters"]
+            sources[region] = str(source_path)
+            region_codepoints[region] = sorted(ord(c) for c in characters)
+            key_parts += [region, hash_file(source_path), hash_codepoints(characters)]
+        if len(sources) < 2:
+            print(f"  ⚠️  {UDSHINGO_FAMILIES[weight]}: fewer than two regional sources, skipped")
+            continue
+        key = hashlib.sha256(":".join(key_parts).encode('utf-8')).hexdigest()
+        entry = cached.get(weight)
+        if use_cache and entry and entry.get("key") == key and outputs_intact(FONTS_DIR / "UD_ShinGo", entry["outputs"]):
+            print(f"  ♻️  {UDSHINGO_FAMILIES[weight]}: cache hit")
+            continue
+        pending.append((weight, sources, region_codepoints, key))
+
+    if pending:
+        arguments = [(weight, sources, cps, layout_features) for weight, sources, cps, _ in pending]
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                results = list(executor.map(build_region_deltas_job, *zip(*arguments)))
+        else:
+            results = [build_region_deltas_job(*args) for args in arguments]
+        for (_, _, _, key), (weight, entry) in zip(pending, results):
+            entry["key"] = key
+            cached[weight] = entry
+
+    deltas = {weight: cached[weight] for weight in UDSHINGO_FAMILIES if weight in cached}
+    regions = sorted({region for entry in deltas.values() for region in entry["deltas"]})
+    for region in regions:
+        css_path = FONTS_DIR / "UD_ShinGo" / f"UDShinGo_{region}.stack.css"
+        css_path.write_text(render_stack_css(region, {w: e for w, e in deltas.items() if region in e["deltas"]}), encoding='utf-8')
+
+    for weight, entry in deltas.items():
+        full = sum(
+            manifest["fonts"].get(font_rel_path, {}).get("outputs", {})
+            .get(Path(font_rel_path).with_suffix(".woff2").name, {}).get("size", 0)
+            for font_rel_path in UDSHINGO_FONTS
+            if Path(font_rel_path).stem.endswith(f"_{weight}") and font_region(font_rel_path) in entry["deltas"]
+        )
+        split = entry["base"]["bytes"] + sum(delta["bytes"] for delta in entry["deltas"].values())
+        parts = ", ".join(f"{region} +{format_size(delta['bytes'])}" for region, delta in entry["deltas"].items())
+        print(
+            f"  🧬 {UDSHINGO_FAMILIES[weight]}: base {format_size(entry['base']['bytes'])} "
+            f"({entry['base']['codepoints']} shared) + {parts}; all regions {format_size(full)} → {format_size(split)}"
+        )
+    print(f"  ✅ Stacking CSS written for {', '.join(regions) or 'no regions'}")
+
+
+def remove_region_deltas(manifest: Dict[str, Any]) -> None:
+    """Delete base/delta fonts and stacking CSS left by an earlier --region-deltas run."""
+    output_dir = FONTS_DIR / "UD_ShinGo"
+    for pattern in ("UDShinGo_base_*.woff2", "UDShinGo_delta_*.woff2", "UDShinGo_*.stack.css"):
+        for candidate in output_dir.glob(pattern):
+            candidate.unlink()
+            print(f"🧹 Removed stale {candidate.relative_to(PROJECT_ROOT)}")
+    manifest.pop("deltas", None)
+
+
+# --------- unicode-range sharding ----------
+def font_face_for(font_rel_path: str) -> Tuple[str, str]:
+    """Return the (font-family, font-weight) the app registers for a font file."""
+    stem = Path(font_rel_path).stem
+    if stem.startswith("HMSans"):
+        return "HMSans", "100 900"  # Variable font
+    return UDSHINGO_FAMILIES.get(stem.rsplit("_", 1)[-1], stem), "normal"
+
+
+def rank_codepoints(characters: Set[str], frequencies: Counter) -> List[int]:
+    """Order codepoints by corpus frequency (most used first), ties broken by codepoint."""
+    return sorted({ord(c) for c in characters}, key=lambda cp: (-frequencies.get(chr(cp), 0), cp))
+
+
+def format_unicode_range(codepoints: Iterable[int]) -> str:
+    """Collapse codepoints into a CSS unicode-range value, e.g. 'U+20-7E, U+4E00'."""
+    ranges: List[str] = []
+    start = prev = None
+    for cp in sorted(set(codepoints)):
+        if prev is not None and cp == prev + 1:
+            prev = cp
+            continue
+        if start is not None:
+            ranges.append(f"U+{start:X}" if start == prev else f"U+{start:X}-{prev:X}")
+        start = prev = cp
+    if start is not None:
+        ranges.append(f"U+{start:X}" if start == prev else f"U+{start:X}-{prev:X}")
+    return ", ".join(ranges)
+
+
+def build_shards(subset_bytes: bytes, ranking: List[int], shard_count: int) -> List[Tuple[List[int], bytes]]:
+    """
+    Split an already-subset font into WOFF2 slices of frequency-ranked codepoints.
+    Re-subsetting the small in-memory subset is far cheaper than going back to the source.
+    Codepoints missing from the font's cmap are dropped so unicode-range never over-claims.
+    """
+    font = TTFont(BytesIO(subset_bytes))
+    cmap = font.getBestCmap() or {}
+    font.close()
+
+    ranked = [cp for cp in ranking if cp in cmap]
+    if not ranked:
+        return []
+    slice_size = -(-len(ranked) // max(1, shard_count))
+
+    shards: List[Tuple[List[int], bytes]] = []
+    for start in range(0, len(ranked), slice_size):
+        codepoints = sorted(ranked[start:start + slice_size])
+        font = open_font(BytesIO(subset_bytes))
+        try:
+            subsetter = subset.Subsetter(options=build_subset_options('woff2'))
+            subsetter.populate(unicodes=codepoints)
+            subsetter.subset(font)
+            font.flavor = 'woff2'
+            buffer = BytesIO()
+            font.save(buffer)
+        finally:
+            font.close()
+        shards.append((codepoints, buffer.getvalue()))
+    return shards
+
+
+def render_shard_css(family: str, weight: str, shards: List[Dict[str, Any]]) -> str:
+    """Render one @font-face rule per shard; the browser only fetches slices whose range is used."""
+    blocks = []
+    for shard in shards:
+        blocks.append(
+            "@font-face {\n"
+            f"  font-family: '{family}';\n"
+            "  font-style: normal;\n"
+            f"  font-weight: {weight};\n"
+            "  font-display: swap;\n"
+            f"  src: url('./{Path(shard['file']).name}') format('woff2');\n"
+            f"  unicode-range: {shard['unicodeRange']};\n"
+            "}"
+        )
+    return "\n\n".join(blocks) + "\n"
+
+
+def write_shard_manifest(manifest: Dict[str, Any], font_paths: Iterable[str]) -> None:
+    """Write src/assets/fonts/shards.json from the shard info recorded per font."""
+    fonts = {}
+    for font_rel_path in font_paths:
+        entry = manifest["fonts"].get(font_rel_path)
+        if entry and entry.get("shards"):
+            fonts[font_rel_path] = entry["shards"]
+    with open(SHARD_MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump({"version": 1, "fonts": fonts}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"🧩 Shard manifest written to {SHARD_MANIFEST_PATH.relative_to(PROJECT_ROOT)} ({len(fonts)} font(s))")
+
+
+# --------- Per-locale font manifest ----------
+def build_locale_font_manifest(
+    manifest: Dict[str, Any],
+    font_paths: Iterable[str],
+    routes: Dict[str, List[str]],
+) -> Dict[str, Any]:
+    """
+    Map every UI locale to the font files its region loads, plus preload hints for first paint.
+    Paths are relative to src/assets/fonts, the same keys getFontAssetUrl() takes (shard files:
+    loadFontSliceUrl(), since the eager glob leaves them out); a sharded font preloads only its
+    first (most frequent) slice.
+    """
+    region_fonts: Dict[str, List[Dict[str, Any]]] = {}
+    sizes: Dict[str, int] = {}
+    for font_rel_path in font_paths:
+        entry = manifest["fonts"].get(font_rel_path)
+        region = font_region(font_rel_path)
+        if not entry or region is None:
+            continue
+        family, weight = font_face_for(font_rel_path)
+        base = Path(font_rel_path).with_suffix("")
+        files = {
+            flavor: base.with_suffix(f".{flavor}").as_posix()
+            for flavor in ("woff2", "woff")
+            if f"{base.name}.{flavor}" in entry["outputs"]
+        }
+        woff2_meta = entry["outputs"].get(f"{base.name}.woff2", {})
+        for name, meta in entry["outputs"].items():
+            sizes[(base.parent / name).as_posix()] = meta.get("size", 0)
+        region_fonts.setdefault(region, []).append({
+            "family": family,
+            "weight": weight,
+            "files": files,
+            "bytes": woff2_meta.get("size", 0),
+            "shards": [shard["file"] for shard in (entry.get("shards") or {}).get("shards", [])],
+        })
+
+    locales = {}
+    for locale_path in sorted((LOCALE_DATA_DIR / "ui").glob("*.json")):
+        regions = route_locale_file(locale_path.stem, routes)
+        fonts = [font for region in regions for font in region_fonts.get(region, [])]
+        preload = [
+            {
+                "href": font["shards"][0] if font["shards"] else font["files"]["woff2"],
+                "as": "font",
+                "type": "font/woff2",
+                "crossorigin": "anonymous",
+            }
+            for font in fonts
+            if font["family"] in FIRST_PAINT_FAMILIES and (font["shards"] or "woff2" in font["files"])
+        ]
+        locales[locale_path.stem] = {
+            "regions": regions,
+            "fonts": fonts,
+            "preload": preload,
+            "bytes": sum(font["bytes"] for font in fonts),
+            "preloadBytes": sum(sizes.get(hint["href"], 0) for hint in preload),
+        }
+    return {"version": 1, "locales": locales}
+
+
+def write_locale_font_manifest(
+    manifest: Dict[str, Any],
+    font_paths: Iterable[str],
+    routes: Dict[str, List[str]],
+) -> None:
+    """Write src/assets/fonts/locales.json and summarize first-load font bytes per region."""
+    font_paths = list(font_paths)
+    data = build_locale_font_manifest(manifest, font_paths, routes)
+    with open(LOCALE_FONT_MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"🗺️  Locale font manifest written to {LOCALE_FONT_MANIFEST_PATH.relative_to(PROJECT_ROOT)} "
+          f"({len(data['locales'])} locale(s))")
+
+    # What the eager glob used to reference: every font's full WOFF2, whatever the locale
+    eager_bytes = sum(
+        manifest["fonts"].get(font_rel_path, {}).get("outputs", {})
+        .get(Path(font_rel_path).with_suffix(".woff2").name, {}).get("size", 0)
+        for font_rel_path in font_paths
+    )
+    summaries = {}
+    for locale, info in data["locales"].items():
+        summaries.setdefault(tuple(info["regions"]), (locale, info))
+    for regions, (locale, info) in summaries.items():
+        print(f"  {'/'.join(regions)} (e.g. {locale}): {len(info['fonts'])} font(s), "
+              f"{format_size(info['bytes'])} WOFF2, {format_size(info['preloadBytes'])} preloaded "
+              f"(all regions: {format_size(eager_bytes)})")
+
+
+# --------- cmap coverage ----------
+def font_source_path(font_rel_path: str) -> Optional[Path]:
+    """The unsubset source of a font: the fonts_original backup, or the asset before the first run."""
+    for path in (ORIGINAL_FONTS_DIR / font_rel_path, FONTS_DIR / font_rel_path):
+        if path.is_file():
+            return path
+    return None
+
+
+def build_cmap_bitmap(font_path: Path) -> bytes:
+    """One bit per codepoint (bit cp % 8 of byte cp // 8) for every codepoint the font maps."""
+    font = TTFont(str(font_path), lazy=True)
+    try:
+        codepoints = (font.getBestCmap() or {}).keys()
+    finally:
+        font.close()
+    bits = bytearray(max(codepoints, default=0) // 8 + 1)
+    for cp in codepoints:
+        bits[cp >> 3] |= 1 << (cp & 7)
+    return bytes(bits)
+
+
+def bitmap_has(bitmap: bytes, cp: int) -> bool:
+    index = cp >> 3
+    return index < len(bitmap) and bool(bitmap[index] >> (cp & 7) & 1)
+
+
+def merge_bitmaps(bitmaps: Iterable[bytes]) -> bytes:
+    """Union of several coverage bitmaps."""
+    merged = bytearray()
+    for bitmap in bitmaps:
+        if len(bitmap) > len(merged):
+            merged.extend(bytes(len(bitmap) - len(merged)))
+        for index, byte in enumerate(bitmap):
+            if byte:
+                merged[index] |= byte
+    return bytes(merged)
+
+
+def load_font_coverage(cache_dir: Path, font_paths: Iterable[str]) -> Dict[str, bytes]:
+    """
+    Return a cmap bitmap per font, cached in <cache>/coverage.json keyed by source hash.
+    A font is only hashed when its size/mtime changed, and only parsed when the hash is new.
+    """
+    cache_path = cache_dir / "coverage.json"
+    cache: Dict[str, Any] = {"version": COVERAGE_CACHE_VERSION, "files": {}, "bitmaps": {}}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        if loaded.get("version") == COVERAGE_CACHE_VERSION:
+            cache = loaded
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"  ⚠️  Ignoring unreadable coverage cache {cache_path}: {e}")
+
+    coverage: Dict[str, bytes] = {}
+    files: Dict[str, Any] = {}
+    dirty = False
+    for font_rel_path in font_paths:
+        source_path = font_source_path(font_rel_path)
+        if source_path is None:
+            continue
+        entry = refresh_file_entry(source_path, cache["files"].get(font_rel_path))
+        if entry["sha256"] not in cache["bitmaps"]:
+            cache["bitmaps"][entry["sha256"]] = base64.b64encode(zlib.compress(build_cmap_bitmap(source_path))).decode('ascii')
+            dirty = True
+        files[font_rel_path] = entry
+        coverage[font_rel_path] = zlib.decompress(base64.b64decode(cache["bitmaps"][entry["sha256"]]))
+
+    if dirty or files != cache["files"]:
+        used = {entry["sha256"] for entry in files.values()}
+        cache = {
+            "version": COVERAGE_CACHE_VERSION,
+            "files": files,
+            "bitmaps": {digest: data for digest, data in cache["bitmaps"].items() if digest in used},
+        }
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_suffix(".json.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(",", ":"), sort_keys=True)
+        os.replace(temp_path, cache_path)
+    return coverage
+
+
+def renders_without_font(char: str) -> bool:
+    """Controls, format characters and line breaks never need a glyph."""
+    return unicodedata.category(char) in ("Cc", "Cf", "Zl", "Zp")
+
+
+def missing_characters(characters: Iterable[str], bitmap: bytes) -> Set[str]:
+    return {c for c in characters if not renders_without_font(c) and not bitmap_has(bitmap, ord(c))}
+
+
+def report_cmap_coverage(coverage: Dict[str, bytes], jobs: List[Tuple[str, str]], charsets: Dict[str, Dict[str, Any]]) -> None:
+    """One line per font whose routed characters are not all in its cmap."""
+    for font_rel_path, charset_id in jobs:
+        if font_rel_path not in coverage:
+            continue
+        missing = missing_characters(charsets[charset_id]["characters"], coverage[font_rel_path])
+        if missing:
+            sample = "".join(sorted(missing)[:12])
+            print(f"  🔍 {font_rel_path}: {len(missing)} routed character(s) not in cmap (e.g. {sample!r})")
+
+
+def iter_json_strings(data: Any, key_path: str = ""):
+    """Yield (key path, string) for every string in a JSON value; list items use their index."""
+    stack = [(key_path, data)]
+    while stack:
+        path, obj = stack.pop()
+        if isinstance(obj, str):
+            yield path, obj
+        elif isinstance(obj, dict):
+            stack.extend((f"{path}.{key}" if path else str(key), value) for key, value in reversed(list(obj.items())))
+        elif isinstance(obj, list):
+            stack.extend((f"{path}.{index}" if path else str(index), value) for index, value in reversed(list(enumerate(obj))))
+
+
+def report_fallback_strings(
+    coverage: Dict[str, bytes],
+    font_paths: Iterable[str],
+    routes: Dict[str, List[str]],
+    limit: int = 20,
+    picker_labels: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    List the locale strings (file › key path) containing characters that no font of their
+    region maps, i.e. text the browser renders with a system fallback font. The language
+    picker labels are checked against every region, since every locale shows them.
+    Returns the number of such strings.
+    """
+    region_bitmaps: Dict[str, List[bytes]] = {}
+    for font_rel_path in font_paths:
+        region = font_region(font_rel_path)
+        if region is not None and font_rel_path in coverage:
+            region_bitmaps.setdefault(region, []).append(coverage[font_rel_path])
+    region_coverage = {region: merge_bitmaps(bitmaps) for region, bitmaps in region_bitmaps.items()}
+
+    total = 0
+    for region, bitmap in sorted(region_coverage.items()):
+        hits = [(locale, label, missing_characters(label, bitmap)) for locale, label in (picker_labels or {}).items()]
+        hits = [hit for hit in hits if hit[2]]
+        if not hits:
+            continue
+        total += len(hits)
+        print(f"\n  language picker ({region}): {len(hits)} label(s)")
+        for locale, label, missing in hits[:limit]:
+            chars = ", ".join(f"{c!r} U+{ord(c):04X}" for c in sorted(missing)[:5])
+            more = f" +{len(missing) - 5}" if len(missing) > 5 else ""
+            print(f"    - {locale} {label!r}: {chars}{more}")
+        if len(hits) > limit:
+            print(f"    ... and {len(hits) - limit} more")
+
+    for json_path in find_json_files(LOCALE_DATA_DIR):
+        regions = [r for r in route_locale_file(json_path.stem, routes) if r in region_coverage]
+        if not regions:
+            continue
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"  ⚠️  Error reading {json_path}: {e}")
+            continue
+        hits = []
+        for key_path, text in iter_json_strings(data):
+            text = unicodedata.normalize('NFC', text)
+            missing = set()
+            for region in regions:
+                missing |= missing_characters(text, region_coverage[region])
+            if missing:
+                hits.append((key_path, missing))
+        if not hits:
+            continue
+        total += len(hits)
+        all_missing = set().union(*(missing for _, missing in hits))
+        print(f"\n  {json_path.relative_to(LOCALE_DATA_DIR)} ({'/'.join(regions)}): {len(hits)} string(s), "
+              f"{len(all_missing)} missing character(s)")
+        for key_path, missing in hits[:limit]:
+            chars = ", ".join(f"{c!r} U+{ord(c):04X}" for c in sorted(missing)[:5])
+            more = f" +{len(missing) - 5}" if len(missing) > 5 else ""
+            print(f"    - {key_path}: {chars}{more}")
+        if len(hits) > limit:
+            print(f"    ... and {len(hits) - limit} more")
+    return total
+
+
+# --------- Size estimation ----------
+def refresh_file_entry(path: Path, entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return {size, mtime_ns, sha256} for a file, re-hashing only when its size/mtime changed."""
+    stat = path.stat()
+    if entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return entry
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hash_file(path)}
+
+
+def glyph_outline_data(font: TTFont) -> List[bytes]:
+    """Outline bytes per glyph ID as the web flavors store them (CFF desubroutinized)."""
+    glyph_order = font.getGlyphOrder()
+    if "glyf" in font:
+        data = font.reader["glyf"]
+        loca = font["loca"]
+        return [data[loca[gid]:loca[gid + 1]] for gid in range(len(glyph_order))]
+    if "CFF " in font:
+        cff = font["CFF "].cff
+        cff.desubroutinize()
+        charstrings = cff[cff.keys()[0]].CharStrings
+        outlines = []
+        for name in glyph_order:
+            charstring = charstrings[name]
+            charstring.compile()
+            outlines.append(charstring.bytecode)
+        return outlines
+    return [b""] * len(glyph_order)
+
+
+def build_size_table_job(path_str: str, layout_features: Optional[List[str]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build a source font's size table: the WOFF2 size of its empty subset ("base") and the
+    compressed bytes each glyph adds. Runs of consecutive glyphs are Brotli-compressed together
+    and each run's output is shared out in proportion to the glyphs' raw outline sizes.
+    """
+    font_path = Path(path_str)
+    font = open_font(str(font_path))
+    try:
+        cmap = font.getBestCmap() or {}
+        glyph_ids = font.getReverseGlyphMap()
+        outlines = glyph_outline_data(font)
+    finally:
+        font.close()
+
+    sizes = [0] * len(outlines)
+    for start in range(0, len(outlines), SIZE_TABLE_RUN):
+        run = outlines[start:start + SIZE_TABLE_RUN]
+        raw = sum(len(outline) for outline in run)
+        if not raw:
+            continue
+        compressed = len(brotli.compress(b"".join(run), quality=11))
+        for offset, outline in enumerate(run):
+            sizes[start + offset] = round(compressed * len(outline) / raw * SIZE_TABLE_SCALE)
+
+    base = len(subset_font_flavors(font_path, set(), layout_features=layout_features)['woff2'])
+    codepoints = sorted(cmap)
+    return path_str, {
+        "base": base,
+        "codepoints": pack_ints(codepoints),
+        "gids": pack_ints([glyph_ids[cmap[cp]] for cp in codepoints]),
+        "sizes": pack_ints(sizes),
+    }
+
 
-def parse_args():
-    parser = ArgumentParser(description="Subset project fonts to used locale characters.")
-    parser.add_argument(
-        "-j",
-        "--workers",
-        type=int,
-        default=None,
-        help="Number of fonts to process in parallel. Defaults to min(4, CPU count minus one).",
-    )
-    return parser.parse_args()
+def size_table_key(source_hash: str, layout_features: Optional[List[str]]) -> str:
+    """Size tables depend on the kept layout features too, since they shape the empty-subset base."""
+    features = ",".join(sorted(layout_features)) if layout_features is not None else "*"
+    return f"{source_hash}:{features}"
 
 
-def collect_characters_from_json(json_path: Path) -> Set[str]:
-    """Extract all characters from a JSON file (recursive)."""
-    chars = set()
-    
+def load_size_tables(
+    cache_dir: Path,
+    font_paths: Iterable[str],
+    layout_features: Optional[List[str]],
+    workers: int = 1,
+    build: bool = True,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Load <cache>/sizes.json and return (cache, {font path: table}); tables are keyed by source
+    hash and layout features, and missing ones are built in a process pool unless `build` is False.
+    """
+    cache_path = cache_dir / "sizes.json"
+    cache: Dict[str, Any] = {"version": SIZE_TABLE_VERSION, "files": {}, "tables": {}}
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        def extract_chars(obj):
-            if isinstance(obj, str):
-                normalized = unicodedata.normalize('NFC', obj)
-                chars.update(normalized)
-            elif isinstance(obj, dict):
-                for value in obj.values():
-                    extract_chars(value)
-            elif isinstance(obj, list):
-                for item in obj:
-                    extract_chars(item)
-        
-        extract_chars(data)
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        if loaded.get("version") == SIZE_TABLE_VERSION:
+            cache = loaded
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        print(f"  ⚠️  Error reading {json_path}: {e}")
-    
-    return chars
+        print(f"  ⚠️  Ignoring unreadable size table cache {cache_path}: {e}")
 
+    keys: Dict[str, str] = {}
+    misses: Dict[str, Path] = {}
+    for font_rel_path in font_paths:
+        source_path = font_source_path(font_rel_path)
+        if source_path is None:
+            continue
+        entry = refresh_file_entry(source_path, cache["files"].get(font_rel_path))
+        cache["files"][font_rel_path] = entry
+        key = keys[font_rel_path] = size_table_key(entry["sha256"], layout_features)
+        if key not in cache["tables"] and build:
+            misses.setdefault(key, source_path)
 
-def collect_locale_characters() -> Set[str]:
-    """Collect all characters from locale JSON files (used for UD_ShinGo + base set)."""
-    print("📖 Collecting characters from locale files...")
-    all_chars = set()
+    if misses:
+        print(f"📏 Building size tables for {len(misses)} font(s)...")
+        paths = [str(path) for path in misses.values()]
+        if workers > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+                built = list(executor.map(build_size_table_job, paths, [layout_features] * len(paths)))
+        else:
+            built = [build_size_table_job(path, layout_features) for path in paths]
+        for key, (_, table) in zip(misses, built):
+            cache["tables"][key] = table
+        save_size_tables(cache_dir, cache)
 
-    # Walk through all JSON files in locale/data
-    for root, dirs, files in os.walk(LOCALE_DATA_DIR):
-        for file in files:
-            if file.endswith('.json'):
-                json_path = Path(root) / file
-                rel_path = json_path.relative_to(LOCALE_DATA_DIR)
-                print(f"  Reading: {rel_path}")
-                chars = collect_characters_from_json(json_path)
-                all_chars.update(chars)
-
-    # Add basic ASCII and common punctuation to ensure proper rendering
-    basic_chars = set(' !"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~0123456789')
-    basic_chars.update('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
-    all_chars.update(basic_chars)
+    tables = {
+        font_rel_path: cache["tables"][key]
+        for font_rel_path, key in keys.items()
+        if key in cache["tables"]
+    }
+    return cache, tables
 
-    print(f"\n✅ Collected {len(all_chars)} unique locale characters")
-    return all_chars
 
+def save_size_tables(cache_dir: Path, cache: Dict[str, Any]) -> None:
+    used = {entry["sha256"] for entry in cache["files"].values()}
+    cache["tables"] = {key: table for key, table in cache["tables"].items() if key.split(":", 1)[0] in used}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_path = cache_dir / "sizes.json"
+    temp_path = cache_path.with_suffix(".json.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, separators=(",", ":"), sort_keys=True)
+    os.replace(temp_path, cache_path)
 
-def collect_public_files_characters() -> Set[str]:
+
+def estimate_woff2_size(table: Dict[str, Any], characters: Set[str], calibrated: bool = True) -> int:
     """
-    Collect characters from public/files (archive JSON/HTML, etc.).
-    Used only for HMSans subsetting — not merged into UD_ShinGo.
+    Predict a font's WOFF2 size for `characters` from its size table: the empty-subset base plus
+    every mapped glyph's share, scaled by the table's calibration against the last real build.
+    Layout closure (ligatures, alternates) is not followed, which calibration absorbs.
     """
-    chars: Set[str] = set()
-    if not PUBLIC_FILES_DIR.is_dir():
-        print("📂 public/files not found — skipping extra HMSans character scan")
-        return chars
+    wanted = {ord(c) for c in characters}
+    sizes = unpack_ints(table["sizes"])
+    gids = {
+        gid for cp, gid in zip(unpack_ints(table["codepoints"]), unpack_ints(table["gids"]))
+        if cp in wanted and gid
+    }
+    glyph_bytes = sum(sizes[gid] for gid in gids) / SIZE_TABLE_SCALE
+    factor = table.get("calibration", 1.0) if calibrated else 1.0
+    return round(table["base"] + glyph_bytes * factor)
 
-    print("📖 Collecting characters from public/files (HMSans only)...")
-    for root, dirs, files in os.walk(PUBLIC_FILES_DIR):
-        for file in files:
-            if not file.endswith('.json'):
-                continue
-            json_path = Path(root) / file
-            try:
-                rel = json_path.relative_to(PROJECT_ROOT)
-            except ValueError:
-                rel = json_path
-            print(f"  Reading: {rel}")
-            chars.update(collect_characters_from_json(json_path))
 
-    print(f"✅ Collected {len(chars)} unique characters from public/files")
-    return chars
+def calibrate_size_tables(
+    cache_dir: Path,
+    manifest: Dict[str, Any],
+    jobs: List[Tuple[str, str]],
+    charsets: Dict[str, Dict[str, Any]],
+    layout_features: Optional[List[str]],
+) -> None:
+    """After a real build, fit each cached table's glyph factor so estimates match the WOFF2 just written."""
+    cache, tables = load_size_tables(cache_dir, [font_path for font_path, _ in jobs], layout_features, build=False)
+    changed = False
+    for font_rel_path, charset_id in jobs:
+        table = tables.get(font_rel_path)
+        entry = manifest["fonts"].get(font_rel_path)
+        woff2_name = Path(font_rel_path).with_suffix(".woff2").name
+        if not table or not entry or woff2_name not in entry["outputs"]:
+            continue
+        glyph_estimate = estimate_woff2_size(table, charsets[charset_id]["characters"], calibrated=False) - table["base"]
+        if glyph_estimate > 0:
+            factor = max(0.0, entry["outputs"][woff2_name]["size"] - table["base"]) / glyph_estimate
+            changed |= table.get("calibration") != factor
+            table["calibration"] = factor
+    if changed:
+        save_size_tables(cache_dir, cache)
 
 
-def subset_font(input_path: Path, output_path: Path, characters: Set[str]) -> None:
-    """Subset a font file to only include specified characters."""
-    # Create output directory if it doesn't exist
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Create a temporary file for subsetting
-    options = subset.Options()
-    options.flavor = None  # Keep original format
-    options.layout_features = ['*']  # Keep all layout features
-    options.name_IDs = ['*']  # Keep all name records
-    options.name_legacy = True
-    options.name_languages = ['*']
-    options.legacy_kern = True
-    options.symbol_cmap = True
-    options.layout_closure = True
-    options.prune_unicode_ranges = True
-    options.recalc_bounds = True
-    options.recalc_timestamp = True
-    options.canonical_order = True
-    
-    # Convert characters set to Unicode codepoints (integers)
-    unicodes = [ord(c) for c in characters]
-    
-    # Create subsetter
-    font = TTFont(str(input_path))
-    subsetter = subset.Subsetter(options=options)
-    subsetter.populate(unicodes=unicodes)
-    subsetter.subset(font)
-    
-    # Save subsetted font
-    font.save(str(output_path))
-    font.close()
+def load_size_budgets(path: Path) -> Dict[str, int]:
+    """Load per-font WOFF2 budgets: {"<font path or glob>": bytes or "120K"/"1.5M"}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        budgets = json.load(f)
+    if not isinstance(budgets, dict):
+        raise ValueError(f"{path}: expected an object of font path/glob → byte budget")
+    return {str(pattern): value if isinstance(value, int) else parse_size(str(value)) for pattern, value in budgets.items()}
 
 
-def convert_to_woff(input_path: Path, output_path: Path, characters: Set[str]) -> None:
-    """Convert and subset font to WOFF format."""
-    options = subset.Options()
-    options.flavor = 'woff'
-    options.desubroutinize = True
-    options.layout_features = ['*']
-    options.name_IDs = ['*']
-    options.name_legacy = True
-    options.name_languages = ['*']
-    options.legacy_kern = True
-    options.symbol_cmap = True
-    options.layout_closure = True
-    options.prune_unicode_ranges = True
-    options.recalc_bounds = True
-    options.recalc_timestamp = True
-    options.canonical_order = True
-    
-    unicodes = [ord(c) for c in characters]
-    
-    font = TTFont(str(input_path))
-    subsetter = subset.Subsetter(options=options)
-    subsetter.populate(unicodes=unicodes)
-    subsetter.subset(font)
-    font.flavor = 'woff'
-    font.save(str(output_path))
-    font.close()
+def budget_for(font_rel_path: str, budgets: Dict[str, int]) -> Optional[int]:
+    """The budget of an exact font path, else of the first glob pattern matching it."""
+    if font_rel_path in budgets:
+        return budgets[font_rel_path]
+    return next((budget for pattern, budget in budgets.items() if fnmatch(font_rel_path, pattern)), None)
 
 
-def convert_to_woff2(input_path: Path, output_path: Path, characters: Set[str]) -> None:
-    """Convert and subset font to WOFF2 format."""
-    options = subset.Options()
-    options.flavor = 'woff2'
-    options.desubroutinize = True
-    options.layout_features = ['*']
-    options.name_IDs = ['*']
-    options.name_legacy = True
-    options.name_languages = ['*']
-    options.legacy_kern = True
-    options.symbol_cmap = True
-    options.layout_closure = True
-    options.prune_unicode_ranges = True
-    options.recalc_bounds = True
-    options.recalc_timestamp = True
-    options.canonical_order = True
-    
-    unicodes = [ord(c) for c in characters]
-    
-    font = TTFont(str(input_path))
-    subsetter = subset.Subsetter(options=options)
-    subsetter.populate(unicodes=unicodes)
-    subsetter.subset(font)
-    font.flavor = 'woff2'
-    font.save(str(output_path))
-    font.close()
+def check_size_budgets(sizes: Dict[str, int], budgets: Dict[str, int], label: str) -> bool:
+    """Print each budgeted font's WOFF2 size against its budget; return False if any is over."""
+    within = True
+    for font_rel_path, size in sizes.items():
+        budget = budget_for(font_rel_path, budgets)
+        if budget is None:
+            continue
+        if size > budget:
+            within = False
+            print(f"  ❌ {font_rel_path}: {label} {format_size(size)} exceeds budget {format_size(budget)} "
+                  f"(+{format_size(size - budget)})")
+        else:
+            print(f"  ✅ {font_rel_path}: {label} {format_size(size)} of {format_size(budget)}")
+    return within
+
+
+# --------- Incremental cache ----------
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_codepoints(characters: Iterable[str]) -> str:
+    """Return a stable digest of a character set (order-independent)."""
+    codepoints = sorted({ord(c) for c in characters})
+    return hashlib.sha256(",".join(map(str, codepoints)).encode('ascii')).hexdigest()
+
+
+def hash_subset_options(extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Digest every option set used by the pipeline, so any option change invalidates the cache.
+    `extra` carries mode-specific settings (e.g. sharding) that also shape the outputs.
+    """
+    profile: Dict[str, Any] = {
+        str(flavor): sorted((k, repr(v)) for k, v in vars(build_subset_options(flavor)).items())
+        for flavor in (None, 'woff', 'woff2')
+    }
+    profile['version'] = CACHE_VERSION
+    profile['extra'] = extra or {}
+    profile['source_date_epoch'] = os.environ.get("SOURCE_DATE_EPOCH")
+    payload = json.dumps(profile, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def compute_cache_key(source_hash: str, chars_hash: str, options_hash: str) -> str:
+    return hashlib.sha256(f"{source_hash}:{chars_hash}:{options_hash}".encode('ascii')).hexdigest()
+
+
+def font_cache_key(
+    original_path: Path,
+    characters: Set[str],
+    shard_ranking: Optional[List[int]] = None,
+    shard_count: int = 0,
+    optimize: bool = False,
+    layout_features: Optional[List[str]] = None,
+) -> str:
+    """Cache key of a process_font job: source bytes, character set and every output-shaping option."""
+    shard_count = max(0, shard_count) if shard_ranking is not None else 0
+    extra_options: Dict[str, Any] = {}
+    if optimize:
+        extra_options["optimize"] = [axis for axis in WOFF2_STRATEGY_AXES]
+    if layout_features is not None:
+        extra_options["layout_features"] = sorted(layout_features)
+    if shard_count:
+        extra_options["shards"] = shard_count
+        extra_options["ranking"] = hashlib.sha256(",".join(map(str, shard_ranking)).encode('ascii')).hexdigest()
+    return compute_cache_key(
+        hash_file(original_path), hash_codepoints(characters), hash_subset_options(extra_options)
+    )
+
+
+def describe_outputs(paths: Iterable[Path]) -> Dict[str, Dict[str, Any]]:
+    """Record size and digest of each generated file, keyed by file name."""
+    return {
+        path.name: {"size": path.stat().st_size, "sha256": hash_file(path)}
+        for path in paths
+    }
+
+
+def outputs_intact(output_dir: Path, recorded: Dict[str, Dict[str, Any]]) -> bool:
+    """Check that every recorded output still exists with the same size and content."""
+    if not recorded:
+        return False
+    for name, meta in recorded.items():
+        path = output_dir / name
+        if not path.is_file() or path.stat().st_size != meta.get("size"):
+            return False
+        if hash_file(path) != meta.get("sha256"):
+            return False
+    return True
+
+
+def load_cache_manifest(cache_dir: Path) -> Dict[str, Any]:
+    manifest_path = cache_dir / "manifest.json"
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == CACHE_VERSION and isinstance(manifest.get("fonts"), dict):
+            return manifest
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"  ⚠️  Ignoring unreadable cache manifest {manifest_path}: {e}")
+    return {"version": CACHE_VERSION, "fonts": {}}
+
+
+def save_cache_manifest(cache_dir: Path, manifest: Dict[str, Any]) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = cache_dir / "manifest.json"
+    temp_path = manifest_path.with_suffix(".json.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
 
 
 def format_size(size_bytes: int) -> str:
@@ -238,12 +1937,113 @@ def format_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} TB"
 
 
+def report_routing_savings(
+    original_path: Path,
+    characters: Set[str],
+    baseline_characters: Set[str],
+    woff2_size: int,
+    log: Callable[[str], None],
+    layout_features: Optional[List[str]] = None,
+) -> None:
+    """Log how much per-locale routing saves compared with subsetting to `baseline_characters`."""
+    dropped = len(baseline_characters - characters)
+    if not dropped:
+        log("  📉 Routing: no characters dropped")
+        return
+    baseline_size = len(subset_font_flavors(original_path, baseline_characters, layout_features=layout_features)['woff2'])
+    saved = baseline_size - woff2_size
+    log(
+        f"  📉 Routing: -{dropped} characters, .woff2 {format_size(baseline_size)} → {format_size(woff2_size)} "
+        f"(saved {format_size(saved)}, {saved / baseline_size * 100:.1f}%)"
+    )
+
+
+def report_feature_cost(
+    original_path: Path,
+    characters: Set[str],
+    layout_features: List[str],
+    log: Callable[[str], None],
+    outputs: Optional[Dict[Optional[str], bytes]] = None,
+) -> Dict[str, Any]:
+    """
+    Log what the features outside `layout_features` would cost: the font is also subset
+    with every feature in memory and compared on glyph count and WOFF2 size.
+    `outputs` are the already-built pruned flavors, rebuilt when omitted (cache hits).
+    """
+    font = open_font(str(original_path), lazy=True)
+    try:
+        excluded = sorted(font_feature_tags(font) - set(layout_features))
+    finally:
+        font.close()
+    if not excluded:
+        log("  🔣 Features: nothing excluded")
+        return {"excluded": [], "glyphs": 0, "bytes": 0}
+
+    if outputs is None:
+        outputs = subset_font_flavors(original_path, characters, layout_features=layout_features)
+    full_metrics: Dict[str, Any] = {}
+    full_size = len(subset_font_flavors(original_path, characters, full_metrics)['woff2'])
+    font = TTFont(BytesIO(outputs[None]))
+    try:
+        kept_glyphs = len(font.getGlyphOrder())
+    finally:
+        font.close()
+    cost = {
+        "excluded": excluded,
+        "glyphs": full_metrics["glyphs_after"] - kept_glyphs,
+        "bytes": full_size - len(outputs['woff2']),
+    }
+    log(
+        f"  🔣 Features: excluded {', '.join(excluded)} → saved {cost['glyphs']} glyph(s), "
+        f"{format_size(cost['bytes'])} .woff2"
+    )
+    return cost
+
+
+def remove_stale_artifacts(output_dir: Path, base_name: str, expected: Set[str], log: Callable[[str], None]) -> None:
+    """
+    Delete generated files for `base_name` that the current run did not produce.
+    Because the app bundles *all* font assets via an eager Vite glob, any stray
+    files left in src/assets/fonts will be emitted into dist/assets even if
+    not referenced at runtime (e.g. "UDShinGo_HK_DB1.woff2").
+    """
+    for pattern in (f"{base_name}*.woff", f"{base_name}*.woff2", f"{base_name}*.css"):
+        for candidate in output_dir.glob(pattern):
+            if candidate.name in expected:
+                continue
+            try:
+                candidate.unlink()
+                log(f"  🧹 Removed stale artifact: {candidate.name}")
+            except Exception as e:
+                log(f"  ⚠️  Failed to remove stale artifact {candidate.name}: {e}")
+
+
 def process_font(
     font_rel_path: str,
     characters: Set[str],
     log: Callable[[str], None] = print,
-) -> None:
-    """Process a single font file: backup, subset, and convert to web formats."""
+    cache_entry: Optional[Dict[str, Any]] = None,
+    shard_ranking: Optional[List[int]] = None,
+    shard_count: int = 0,
+    baseline_characters: Optional[Set[str]] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    optimize: bool = False,
+    layout_features: Optional[List[str]] = None,
+    feature_report: bool = False,
+    closure_dir: Optional[str] = None,
+) -> Optional[Tuple[bool, Dict[str, Any]]]:
+    """
+    Process a single font file: backup, subset, and convert to web formats.
+    Returns (cache_hit, manifest_entry), or None when the font is missing.
+    Outputs are left untouched when `cache_entry` matches the current inputs.
+    With `shard_count`, the WOFF2 is also split into slices along `shard_ranking`.
+    With `baseline_characters`, the WOFF2 size saved versus that set is reported.
+    With `metrics`, stage timings, glyph counts and output sizes are recorded in it.
+    With `optimize`, the smallest valid WOFF2 across several encoding strategies is kept.
+    `layout_features` limits the kept OpenType features (None keeps all); with `feature_report`,
+    the glyphs and WOFF2 bytes the other features would add are reported.
+    `closure_dir` lets sibling weights share one GSUB closure (see subset_font_flavors).
+    """
     target_path = FONTS_DIR / font_rel_path
     original_path = ORIGINAL_FONTS_DIR / font_rel_path
     
@@ -259,7 +2059,7 @@ def process_font(
         shutil.copy2(target_path, original_path)
     else:
         log(f"  ⚠️  Font not found (checked assets and backup): {font_rel_path}")
-        return
+        return None
 
     log(f"\n🔤 Processing: {font_rel_path}")
     log(f"   Source: {original_path.relative_to(PROJECT_ROOT)}")
@@ -275,61 +2075,258 @@ def process_font(
     # Ensure output directory exists
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Clean stale artifacts from older tooling/runs.
-    # Because the app bundles *all* font assets via an eager Vite glob, any stray
-    # files left in src/assets/fonts will be emitted into dist/assets even if
-    # not referenced at runtime (e.g. "UDShinGo_HK_DB1.woff2").
-    expected_woff = f"{base_name}.woff"
-    expected_woff2 = f"{base_name}.woff2"
-    for candidate in output_dir.glob(f"{base_name}*.woff"):
-        if candidate.name != expected_woff:
-            try:
-                candidate.unlink()
-                log(f"  🧹 Removed stale artifact: {candidate.name}")
-            except Exception as e:
-                log(f"  ⚠️  Failed to remove stale artifact {candidate.name}: {e}")
-    for candidate in output_dir.glob(f"{base_name}*.woff2"):
-        if candidate.name != expected_woff2:
-            try:
-                candidate.unlink()
-                log(f"  🧹 Removed stale artifact: {candidate.name}")
-            except Exception as e:
-                log(f"  ⚠️  Failed to remove stale artifact {candidate.name}: {e}")
-    
-    # Subset original format (keep extension)
-    log(f"  ⚙️  Subsetting {ext} format...")
-    temp_output = output_dir / f"{base_name}_subset{ext}"
-    subset_font(original_path, temp_output, characters)
+    woff_path = output_dir / f"{base_name}.woff"
+    woff2_path = output_dir / f"{base_name}.woff2"
+
+    shard_count = max(0, shard_count) if shard_ranking is not None else 0
+
+    # Skip when source font, character set and options are unchanged and outputs are intact
+    cache_key = font_cache_key(original_path, characters, shard_ranking, shard_count, optimize, layout_features)
+    if cache_entry and cache_entry.get("key") == cache_key and outputs_intact(output_dir, cache_entry.get("outputs", {})):
+        remove_stale_artifacts(output_dir, base_name, set(cache_entry["outputs"]), log)
+        log("  ♻️  Cache hit — outputs up to date")
+        if metrics is not None:
+            metrics["cache_hit"] = True
+            metrics["bytes"] = {name: meta["size"] for name, meta in cache_entry["outputs"].items()}
+        if baseline_characters is not None:
+            woff2_size = cache_entry["outputs"][woff2_path.name]["size"]
+            report_routing_savings(original_path, characters, baseline_characters, woff2_size, log, layout_features)
+        if feature_report and layout_features is not None:
+            report_feature_cost(original_path, characters, layout_features, log)
+        return True, cache_entry
     
-    # Replace target in assets dir with subsetted version
-    shutil.move(str(temp_output), str(target_path))
-    new_size = target_path.stat().st_size
+    # Subset once, then write every flavor straight from memory
+    log(f"  ⚙️  Subsetting {ext} + WOFF + WOFF2...")
+    flavor_metrics = metrics if metrics is not None else {}
+    outputs = subset_font_flavors(original_path, characters, flavor_metrics, layout_features, closure_dir)
+    if flavor_metrics.get("closure_reused"):
+        log("  🔗 Reused the glyph closure of a sibling font")
+    if metrics is not None:
+        metrics["cache_hit"] = False
+
+    target_path.write_bytes(outputs[None])
+    new_size = len(outputs[None])
     reduction = (1 - new_size / original_size) * 100
     log(f"  ✅ {ext}: {format_size(original_size)} → {format_size(new_size)} ({reduction:.1f}% reduction)")
-    
-    # Generate WOFF format
-    woff_path = output_dir / f"{base_name}.woff"
-    log(f"  ⚙️  Generating WOFF...")
-    convert_to_woff(original_path, woff_path, characters)
-    woff_size = woff_path.stat().st_size
-    log(f"  ✅ .woff: {format_size(woff_size)} (generated)")
-    
-    # Generate WOFF2 format
-    woff2_path = output_dir / f"{base_name}.woff2"
-    log(f"  ⚙️  Generating WOFF2...")
-    convert_to_woff2(original_path, woff2_path, characters)
-    woff2_size = woff2_path.stat().st_size
-    log(f"  ✅ .woff2: {format_size(woff2_size)} (generated)")
+
+    woff_path.write_bytes(outputs['woff'])
+    log(f"  ✅ .woff: {format_size(len(outputs['woff']))} (generated)")
+
+    optimizer_report = None
+    if optimize:
+        log("  ⚙️  Optimizing WOFF2 strategies...")
+        started = time.perf_counter()
+        outputs['woff2'], optimizer_report = optimize_woff2(outputs[None], outputs['woff2'])
+        if metrics is not None:
+            metrics["seconds"]["optimize"] = time.perf_counter() - started
+            metrics["optimizer"] = optimizer_report
+        log(
+            f"  🗜️  Optimizer: {optimizer_report['chosen']} saved {format_size(optimizer_report['saved'])} "
+            f"({optimizer_report['saved'] / optimizer_report['default'] * 100:.1f}%)"
+        )
+
+    woff2_path.write_bytes(outputs['woff2'])
+    log(f"  ✅ .woff2: {format_size(len(outputs['woff2']))} (generated)")
+    if baseline_characters is not None:
+        report_routing_savings(
+            original_path, characters, baseline_characters, len(outputs['woff2']), log, layout_features
+        )
+    feature_cost = None
+    if feature_report and layout_features is not None:
+        feature_cost = report_feature_cost(original_path, characters, layout_features, log, outputs)
+        if metrics is not None:
+            metrics["features"] = feature_cost
+
+    written = [target_path, woff_path, woff2_path]
+    shard_info = None
+    if shard_count:
+        log(f"  ⚙️  Sharding WOFF2 into {shard_count} unicode-range slices...")
+        family, weight = font_face_for(font_rel_path)
+        shard_entries = []
+        started = time.perf_counter()
+        shards = build_shards(outputs[None], shard_ranking, shard_count)
+        if metrics is not None:
+            metrics["seconds"]["shards"] = time.perf_counter() - started
+            metrics["bytes"]["shards"] = [len(data) for _, data in shards]
+        for index, (codepoints, data) in enumerate(shards):
+            shard_path = output_dir / f"{base_name}.s{index:02d}.woff2"
+            shard_path.write_bytes(data)
+            written.append(shard_path)
+            shard_entries.append({
+                "file": shard_path.relative_to(FONTS_DIR).as_posix(),
+                "unicodeRange": format_unicode_range(codepoints),
+                "codepoints": len(codepoints),
+                "bytes": len(data),
+            })
+        css_path = output_dir / f"{base_name}.shards.css"
+        css_path.write_text(render_shard_css(family, weight, shard_entries), encoding='utf-8')
+        written.append(css_path)
+        shard_info = {
+            "family": family,
+            "weight": weight,
+            "css": css_path.relative_to(FONTS_DIR).as_posix(),
+            "shards": shard_entries,
+        }
+        sizes = ", ".join(format_size(entry["bytes"]) for entry in shard_entries)
+        log(f"  ✅ shards: {len(shard_entries)} slice(s) [{sizes}]")
+
+    # Clean stale artifacts from older tooling/runs (including shards from a previous --shards N).
+    remove_stale_artifacts(output_dir, base_name, {path.name for path in written}, log)
+
+    entry: Dict[str, Any] = {
+        "key": cache_key,
+        "outputs": describe_outputs(written),
+    }
+    if shard_info:
+        entry["shards"] = shard_info
+    if optimizer_report:
+        entry["optimizer"] = optimizer_report
+    if feature_cost:
+        entry["features"] = feature_cost
+    return False, entry
+
+
+# Charset profiles and run options shipped once per worker by init_font_worker; jobs refer to charsets by ID.
+_WORKER_CHARSETS: Dict[str, Dict[str, Any]] = {}
+_WORKER_OPTIONS: Dict[str, Any] = {}
 
 
-def process_font_job(font_rel_path: str, characters: Set[str]):
-    """Run a font job in a worker process and return buffered logs."""
+def init_font_worker(charsets: Dict[str, Dict[str, Any]], run_options: Optional[Dict[str, Any]] = None) -> None:
+    """Pool initializer: receive every charset profile once instead of pickling it per job."""
+    global _WORKER_CHARSETS, _WORKER_OPTIONS
+    _WORKER_CHARSETS = charsets
+    _WORKER_OPTIONS = run_options or {}
+
+
+def reset_peak_rss() -> None:
+    """Reset this process's peak-RSS counter so it can be measured per job (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of the current process since the last reset_peak_rss(),
+    falling back to the lifetime peak from getrusage, or None where neither is available.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def process_font_job(
+    font_rel_path: str,
+    charset_id: str,
+    cache_entry: Optional[Dict[str, Any]] = None,
+):
+    """Run a font job in a worker process and return its result, buffered logs and metrics."""
+    charset = _WORKER_CHARSETS[charset_id]
     logs = []
-    process_font(font_rel_path, characters, logs.append)
-    return font_rel_path, "\n".join(logs)
+    metrics: Optional[Dict[str, Any]] = {} if _WORKER_OPTIONS.get("metrics") else None
+    profile_dir = _WORKER_OPTIONS.get("profile_dir")
+    profiler = cProfile.Profile() if profile_dir else None
+
+    reset_peak_rss()
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        result = process_font(
+            font_rel_path,
+            charset["characters"],
+            logs.append,
+            cache_entry,
+            metrics=metrics,
+            **charset["options"],
+            **_WORKER_OPTIONS.get("font_options", {}),
+        )
+    finally:
+        if profiler:
+            profiler.disable()
+            profile_path = Path(profile_dir) / f"{Path(font_rel_path).stem}.pid{os.getpid()}.prof"
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(profile_path))
+            logs.append(f"  📊 Profile written to {profile_path}")
+
+    peak_rss = peak_rss_bytes()
+    if result is not None and not result[0] and peak_rss is not None:
+        # Measured on a real build; cache hits keep the previous measurement
+        result[1]["peak_rss"] = peak_rss
+    if metrics is not None:
+        metrics["seconds"] = dict(metrics.get("seconds", {}), total=time.perf_counter() - started)
+        metrics["worker"] = {"pid": os.getpid(), "peak_rss": peak_rss}
+    return font_rel_path, result, "\n".join(logs), metrics
 
 
-def run_font_jobs(title: str, jobs, workers: int) -> None:
+def record_font_result(manifest: Dict[str, Any], stats: Dict[str, int], font_rel_path: str, result) -> None:
+    """Store a job result in the cache manifest and tally hits/misses."""
+    if result is None:
+        manifest["fonts"].pop(font_rel_path, None)
+        return
+    cache_hit, entry = result
+    manifest["fonts"][font_rel_path] = entry
+    stats["hits" if cache_hit else "misses"] += 1
+
+
+def estimate_job_cost(font_rel_path: str, characters: Set[str]) -> int:
+    """Rough relative cost of a font job: source size × charset size."""
+    for path in (ORIGINAL_FONTS_DIR / font_rel_path, FONTS_DIR / font_rel_path):
+        if path.is_file():
+            return path.stat().st_size * max(1, len(characters))
+    return 0
+
+
+# Fallback peak RSS estimate for fonts without a measurement: interpreter + fontTools baseline
+# plus a multiple of the source size for decompiled tables and charstrings.
+JOB_BASE_RSS = 100 * 1024 * 1024
+JOB_RSS_PER_SOURCE_BYTE = 10
+
+
+def estimate_job_peak_rss(font_rel_path: str, cache_entry: Optional[Dict[str, Any]]) -> int:
+    """Expected peak RSS of a font job: the last measured peak, else a guess from the source size."""
+    if cache_entry and cache_entry.get("peak_rss"):
+        return cache_entry["peak_rss"]
+    for path in (ORIGINAL_FONTS_DIR / font_rel_path, FONTS_DIR / font_rel_path):
+        if path.is_file():
+            return JOB_BASE_RSS + path.stat().st_size * JOB_RSS_PER_SOURCE_BYTE
+    return JOB_BASE_RSS
+
+
+def run_font_jobs(
+    title: str,
+    jobs: List[Tuple[str, str]],
+    charsets: Dict[str, Dict[str, Any]],
+    workers: int,
+    manifest: Dict[str, Any],
+    stats: Dict[str, int],
+    use_cache: bool = True,
+    run_options: Optional[Dict[str, Any]] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    memory_budget: Optional[int] = None,
+) -> None:
+    """
+    Run (font_path, charset_id) jobs over one shared pool, longest job first.
+    `charsets` maps each ID to {"characters": set, "options": extra process_font kwargs}.
+    `run_options` ({"metrics": bool, "profile_dir": str, "font_options": process_font kwargs})
+    apply to every job; per-font
+    metrics are collected into `metrics` keyed by font path.
+    With `memory_budget`, a job only starts while the estimated peak RSS of all running
+    jobs stays within the budget; a job that exceeds it on its own runs alone.
+    With font_options["closure_dir"], sibling fonts sharing a closure fingerprint wait for the
+    first of them to finish so they can reuse its closure, unless a worker would sit idle.
+    """
     print("\n" + "=" * 70)
     print(title)
     print("=" * 70)
@@ -338,35 +2335,288 @@ def run_font_jobs(title: str, jobs, workers: int) -> None:
         print("No fonts configured.")
         return
 
+    def cached(font_path: str) -> Optional[Dict[str, Any]]:
+        return manifest["fonts"].get(font_path) if use_cache else None
+
+    # Start the biggest fonts first so they don't become the tail of the run
+    jobs = sorted(
+        jobs,
+        key=lambda job: estimate_job_cost(job[0], charsets[job[1]]["characters"]),
+        reverse=True,
+    )
+
     effective_workers = max(1, min(workers, len(jobs)))
     if effective_workers == 1:
-        for font_path, characters in jobs:
-            process_font(font_path, characters)
+        init_font_worker(charsets, run_options)
+        for font_path, charset_id in jobs:
+            _, result, output, font_metrics = process_font_job(font_path, charset_id, cached(font_path))
+            if output:
+                print(output)
+            record_font_result(manifest, stats, font_path, result)
+            if metrics is not None and font_metrics is not None:
+                metrics[font_path] = font_metrics
         return
 
     print(f"Processing {len(jobs)} fonts with {effective_workers} parallel workers...")
-    failures = []
-    with ProcessPoolExecutor(max_workers=effective_workers) as executor:
-        futures = {
-            executor.submit(process_font_job, font_path, characters): font_path
-            for font_path, characters in jobs
+    if memory_budget:
+        print(f"Memory budget: {format_size(memory_budget)} of estimated peak RSS across running jobs")
+    # Estimates come from the manifest even with --force, since a measured peak stays valid
+    peaks = {font_path: estimate_job_peak_rss(font_path, manifest["fonts"].get(font_path)) for font_path, _ in jobs}
+    font_options = (run_options or {}).get("font_options", {})
+
+    def will_rebuild(font_path: str, charset_id: str) -> bool:
+        entry = cached(font_path)
+        original_path = ORIGINAL_FONTS_DIR / font_path
+        if not entry or not original_path.is_file():
+            return True
+        charset = charsets[charset_id]
+        options = charset["options"]
+        return entry.get("key") != font_cache_key(
+            original_path,
+            charset["characters"],
+            options.get("shard_ranking"),
+            options.get("shard_count", 0),
+            font_options.get("optimize", False),
+            font_options.get("layout_features"),
+        )
+
+    # Only rebuilt fonts compute a closure, so cache hits never open their source font here
+    fingerprints: Dict[str, Optional[str]] = {}
+    if font_options.get("closure_dir"):
+        fingerprints = {
+            font_path: source_closure_fingerprint(
+                font_path, charsets[charset_id]["characters"], font_options.get("layout_features")
+            )
+            for font_path, charset_id in jobs
+            if will_rebuild(font_path, charset_id)
         }
+    # Fingerprints whose closure is being computed right now, and those already on disk
+    computing: Set[str] = set()
+    computed: Set[str] = set()
+    failures = []
+    with ProcessPoolExecutor(
+        max_workers=effective_workers,
+        initializer=init_font_worker,
+        initargs=(charsets, run_options),
+    ) as executor:
+        pending = list(jobs)
+        running: Dict[Any, str] = {}
+        reserved = 0
 
-        for future in as_completed(futures):
-            font_path = futures[future]
-            try:
-                _, output = future.result()
-                if output:
-                    print(output)
-            except Exception as e:
-                failures.append((font_path, e))
-                print(f"\n❌ Failed processing {font_path}: {e}")
+        def fits(font_path: str) -> bool:
+            return not memory_budget or not running or reserved + peaks[font_path] <= memory_budget
+
+        def admit() -> None:
+            nonlocal reserved
+            while pending and len(running) < effective_workers:
+                # Largest pending job that fits, preferring jobs not waiting on a sibling's closure;
+                # with nothing running, the largest job always starts
+                candidates = [i for i, (font_path, _) in enumerate(pending) if fits(font_path)]
+                index = next((i for i in candidates if fingerprints.get(pending[i][0]) not in computing), None)
+                if index is None:
+                    index = candidates[0] if candidates else None
+                if index is None:
+                    return
+                font_path, charset_id = pending.pop(index)
+                fingerprint = fingerprints.get(font_path)
+                if fingerprint and fingerprint not in computed:
+                    computing.add(fingerprint)
+                future = executor.submit(process_font_job, font_path, charset_id, cached(font_path))
+                running[future] = font_path
+                reserved += peaks[font_path]
+
+        admit()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                font_path = running.pop(future)
+                reserved -= peaks[font_path]
+                fingerprint = fingerprints.get(font_path)
+                if fingerprint in computing:
+                    computing.discard(fingerprint)
+                    computed.add(fingerprint)
+                try:
+                    _, result, output, font_metrics = future.result()
+                    if output:
+                        print(output)
+                    record_font_result(manifest, stats, font_path, result)
+                    if metrics is not None and font_metrics is not None:
+                        metrics[font_path] = font_metrics
+                except Exception as e:
+                    failures.append((font_path, e))
+                    print(f"\n❌ Failed processing {font_path}: {e}")
+            admit()
 
     if failures:
         failed_fonts = ", ".join(font_path for font_path, _ in failures)
         raise RuntimeError(f"Font subsetting failed for: {failed_fonts}")
 
 
+# --------- Watch mode ----------
+def load_warm_font(original_path: Path) -> TTFont:
+    """Parse a source font fully so later rebuilds only pay for a copy, closure and serialization."""
+    font = open_font(BytesIO(original_path.read_bytes()))
+    font.ensureDecompiled()
+    pin_timestamp(font)
+    return font
+
+
+def subset_warm_woff2(template: TTFont, characters: Set[str], layout_features: Optional[List[str]] = None) -> bytes:
+    """Subset a clone of a warm font straight to WOFF2 (the only flavor the dev server needs)."""
+    font = copy.deepcopy(template)
+    try:
+        subsetter = subset.Subsetter(options=build_subset_options('woff2', layout_features))
+        subsetter.populate(unicodes=[ord(c) for c in characters])
+        subsetter.subset(font)
+        font.flavor = 'woff2'
+        buffer = BytesIO()
+        font.save(buffer)
+        return buffer.getvalue()
+    finally:
+        font.close()
+
+
+def snapshot_json_files(root_dir: Path) -> Dict[Path, Tuple[int, int]]:
+    snapshot = {}
+    for json_path in find_json_files(root_dir):
+        try:
+            stat = json_path.stat()
+        except FileNotFoundError:
+            continue
+        snapshot[json_path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def watch_locales(
+    font_jobs: List[Tuple[str, bool]],
+    built: Dict[str, Set[str]],
+    routes: Dict[str, List[str]],
+    files_chars: Set[str],
+    codepoint_cache: Dict[str, Any],
+    interval: float,
+    layout_features: Optional[List[str]] = None,
+) -> None:
+    """
+    Poll src/locale/data and rebuild a font's WOFF2 only when its routed charset gains codepoints.
+    Per-file counts and parsed source fonts stay in memory between edits. Removed characters
+    are left in place until the next full run, which also refreshes the other flavors.
+    """
+    # Snapshot before scanning: an edit saved during the scan (or the initial build) is either in
+    # the counts already or shows up as a change on the first poll
+    snapshot = snapshot_json_files(LOCALE_DATA_DIR)
+    file_counts = scan_json_counts(find_json_files(LOCALE_DATA_DIR), codepoint_cache, 1)
+    picker_chars = "".join(load_picker_labels().values())
+    warm_fonts: Dict[str, TTFont] = {}
+
+    def rebuild_gained() -> None:
+        locale_chars, region_chars = merge_locale_counts(file_counts, routes, always_chars=picker_chars)
+        for font_rel_path, include_files in font_jobs:
+            if font_rel_path not in built:
+                continue
+            _, chars = resolve_font_characters(
+                font_rel_path, include_files, locale_chars, region_chars, files_chars
+            )
+            gained = chars - built[font_rel_path]
+            if not gained:
+                continue
+
+            started = time.perf_counter()
+            if font_rel_path not in warm_fonts:
+                warm_fonts[font_rel_path] = load_warm_font(ORIGINAL_FONTS_DIR / font_rel_path)
+            data = subset_warm_woff2(warm_fonts[font_rel_path], chars, layout_features)
+            woff2_path = (FONTS_DIR / font_rel_path).with_suffix(".woff2")
+            temp_path = woff2_path.with_suffix(".woff2.tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, woff2_path)
+            built[font_rel_path] = chars
+            print(
+                f"  ✅ {woff2_path.relative_to(FONTS_DIR)}: +{len(gained)} character(s) "
+                f"→ {format_size(len(data))} in {time.perf_counter() - started:.2f}s"
+            )
+
+    print(f"\n👀 Watching {LOCALE_DATA_DIR.relative_to(PROJECT_ROOT)} for changes (Ctrl+C to stop)...")
+    try:
+        # `built` predates the initial build; catch up on edits saved while it ran
+        rebuild_gained()
+        while True:
+            time.sleep(interval)
+            current = snapshot_json_files(LOCALE_DATA_DIR)
+            changed = [path for path, stamp in current.items() if snapshot.get(path) != stamp]
+            removed = [path for path in snapshot if path not in current]
+            snapshot = current
+            if not changed and not removed:
+                continue
+
+            for json_path in removed:
+                file_counts.pop(json_path, None)
+            for json_path in changed:
+                try:
+                    file_counts[json_path] = count_characters_from_json(json_path)
+                except Exception as e:
+                    # Usually a half-saved file; keep the previous counts and retry on the next save
+                    print(f"  ⚠️  Error reading {json_path.relative_to(PROJECT_ROOT)}: {e}")
+                    continue
+                print(f"  ✏️  {json_path.relative_to(LOCALE_DATA_DIR)} changed")
+            rebuild_gained()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+def output_digests(manifest: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    return {
+        font_path: {name: meta["sha256"] for name, meta in entry.get("outputs", {}).items()}
+        for font_path, entry in manifest["fonts"].items()
+    }
+
+
+def verify_reproducible(
+    jobs: List[Tuple[str, str]],
+    charsets: Dict[str, Dict[str, Any]],
+    workers: int,
+    manifest: Dict[str, Any],
+    run_options: Dict[str, Any],
+    memory_budget: Optional[int] = None,
+) -> None:
+    """Rebuild every font a second time and exit non-zero if any output differs byte-for-byte."""
+    first = output_digests(manifest)
+    second_manifest = {"version": CACHE_VERSION, "fonts": {}}
+    run_font_jobs(
+        "Reproducibility check: rebuilding every font",
+        jobs,
+        charsets,
+        workers,
+        second_manifest,
+        {"hits": 0, "misses": 0},
+        use_cache=False,
+        run_options=dict(run_options, metrics=False, profile_dir=None),
+        memory_budget=memory_budget,
+    )
+    second = output_digests(second_manifest)
+
+    mismatches = [
+        f"{font_path}: {name}"
+        for font_path in sorted(set(first) | set(second))
+        for name in sorted(set(first.get(font_path, {})) | set(second.get(font_path, {})))
+        if first.get(font_path, {}).get(name) != second.get(font_path, {}).get(name)
+    ]
+    if mismatches:
+        print("\n❌ Outputs are not byte-reproducible:")
+        for line in mismatches:
+            print(f"  - {line}")
+        raise SystemExit(1)
+    print(f"\n✅ Reproducible: {sum(len(names) for names in second.values())} output(s) byte-identical across two builds")
+
+
+def write_metrics(path: Path, fonts: Dict[str, Any], run: Dict[str, Any]) -> None:
+    """Write the --metrics report, fonts sorted by total time so the slowest come first."""
+    ordered = dict(sorted(fonts.items(), key=lambda item: -item[1].get("seconds", {}).get("total", 0)))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"run": run, "fonts": ordered}, f, indent=2)
+        f.write("\n")
+    print(f"📈 Metrics written to {path}")
+
+
 def resolve_worker_count(requested_workers: Optional[int]) -> int:
     if requested_workers is not None:
         return max(1, requested_workers)
@@ -382,36 +2632,178 @@ def main():
     print("Font Subsetting Script for Atlos Project")
     print("=" * 70)
     
-    # Locale-only subset for UD_ShinGo; locale + public/files for HMSans
-    locale_chars = collect_locale_characters()
-    files_chars = collect_public_files_characters()
+    # Locale-only subset for UD_ShinGo; locale + public/files for HMSans.
+    # Each font only gets the characters of the locales routed to its region.
+    routes = load_locale_routes(args.locale_routes)
+    workers = resolve_worker_count(args.workers)
+    codepoint_cache = (
+        {"version": CODEPOINT_CACHE_VERSION, "files": {}} if args.force else load_codepoint_cache(args.cache_dir)
+    )
+    frequencies: Counter = Counter()
+    locale_chars, region_chars = collect_locale_characters(frequencies, routes, codepoint_cache, workers)
+    files_chars = collect_public_files_characters(codepoint_cache, workers)
+    save_codepoint_cache(args.cache_dir, codepoint_cache)
     harmony_chars = set(locale_chars)
     harmony_chars.update(files_chars)
 
+    if args.shards > 0:
+        print(f"unicode-range sharding: {args.shards} slice(s) per font")
+    layout_features = resolve_layout_features(args.layout_features)
+
+    charsets: Dict[str, Dict[str, Any]] = {}
+
+    def charset_for(font_rel_path: str, include_files: bool) -> str:
+        """Register (once) and return the charset profile ID for a font's routed characters."""
+        charset_id, chars = resolve_font_characters(
+            font_rel_path, include_files, locale_chars, region_chars, files_chars
+        )
+        if charset_id not in charsets:
+            options: Dict[str, Any] = {}
+            if args.shards > 0:
+                # Ranked by locale frequency; public/files-only characters land in the last slices
+                options["shard_ranking"] = rank_codepoints(chars, frequencies)
+                options["shard_count"] = args.shards
+            if args.routing_report:
+                options["baseline_characters"] = harmony_chars if include_files else locale_chars
+            charsets[charset_id] = {"characters": chars, "options": options}
+        return charset_id
+
+    # UD_ShinGo gets locale data only; Harmony / HMSans also gets public/files text
+    jobs = [(font_path, charset_for(font_path, include_files=False)) for font_path in UDSHINGO_FONTS]
+    jobs += [(font_path, charset_for(font_path, include_files=True)) for font_path in HARMONY_FONTS]
+
+    started = time.perf_counter()
+    coverage = load_font_coverage(args.cache_dir, UDSHINGO_FONTS + HARMONY_FONTS)
+    if args.fallback_report:
+        print("\n🔍 Locale strings rendered with a fallback font:")
+        count = report_fallback_strings(coverage, UDSHINGO_FONTS + HARMONY_FONTS, routes,
+                                        picker_labels=load_picker_labels())
+        print(f"\n{count} string(s) need a fallback font ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return
+    report_cmap_coverage(coverage, jobs, charsets)
+    budgets = load_size_budgets(args.budgets) if args.budgets else {}
+
+    if args.estimate:
+        started = time.perf_counter()
+        _, tables = load_size_tables(args.cache_dir, [font_path for font_path, _ in jobs], layout_features, workers)
+        manifest = load_cache_manifest(args.cache_dir)
+        print("\n📏 Estimated WOFF2 sizes:")
+        estimates = {}
+        for font_path, charset_id in jobs:
+            if font_path not in tables:
+                print(f"  ⚠️  {font_path}: source font not found")
+                continue
+            estimates[font_path] = estimate_woff2_size(tables[font_path], charsets[charset_id]["characters"])
+            last = manifest["fonts"].get(font_path, {}).get("outputs", {}).get(Path(font_path).with_suffix(".woff2").name)
+            last_text = f" (last build {format_size(last['size'])})" if last else ""
+            print(f"  {font_path}: ~{format_size(estimates[font_path])}{last_text}")
+        print(f"Estimated {len(estimates)} font(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if budgets and not check_size_budgets(estimates, budgets, "estimated"):
+            raise SystemExit(1)
+        return
+
     # Create original fonts directory
     ORIGINAL_FONTS_DIR.mkdir(parents=True, exist_ok=True)
-    workers = resolve_worker_count(args.workers)
     print(f"Parallel workers: {workers}")
 
-    # Process UD_ShinGo fonts (locale data only)
-    run_font_jobs(
-        "Processing UD_ShinGo Fonts",
-        [(font_path, locale_chars) for font_path in UDSHINGO_FONTS],
-        workers,
-    )
+    manifest = load_cache_manifest(args.cache_dir)
+    stats = {"hits": 0, "misses": 0}
+    use_cache = not (args.force or args.verify_reproducible)
+    if args.force:
+        print("Incremental cache disabled (--force)")
 
-    # Process Harmony / HMSans (locale + public/files text)
-    run_font_jobs(
-        "Processing Harmony Fonts (HMSans — includes public/files)",
-        [(font_path, harmony_chars) for font_path in HARMONY_FONTS],
-        workers,
-    )
+    run_options = {
+        "metrics": args.metrics is not None,
+        "profile_dir": str(args.profile) if args.profile else None,
+        "font_options": {
+            "optimize": args.optimize,
+            "layout_features": layout_features,
+            "feature_report": args.feature_report,
+            "closure_dir": str(args.cache_dir / "closures"),
+        },
+    }
+    # Closures are keyed by closure_fingerprint (source tables, codepoints, features and
+    # CACHE_VERSION), so entries from earlier runs stay valid; --force starts from scratch
+    if args.force:
+        shutil.rmtree(args.cache_dir / "closures", ignore_errors=True)
+    font_metrics: Optional[Dict[str, Any]] = {} if args.metrics else None
+    started = time.perf_counter()
+    try:
+        run_font_jobs(
+            "Processing UD_ShinGo + Harmony Fonts (HMSans includes public/files)",
+            jobs,
+            charsets,
+            workers,
+            manifest,
+            stats,
+            use_cache,
+            run_options,
+            font_metrics,
+            args.memory_budget,
+        )
+    finally:
+        # Persist whatever finished, so a failed run doesn't discard completed fonts
+        save_cache_manifest(args.cache_dir, manifest)
+        if args.metrics:
+            write_metrics(args.metrics, font_metrics, {
+                "workers": workers,
+                "memory_budget": args.memory_budget,
+                "wall_seconds": time.perf_counter() - started,
+                "cache": stats,
+                "characters": {charset_id: len(charset["characters"]) for charset_id, charset in charsets.items()},
+            })
+
+    if args.verify_reproducible:
+        verify_reproducible(jobs, charsets, workers, manifest, run_options, args.memory_budget)
+
+    if args.shards > 0:
+        write_shard_manifest(manifest, UDSHINGO_FONTS + HARMONY_FONTS)
+    elif SHARD_MANIFEST_PATH.exists():
+        SHARD_MANIFEST_PATH.unlink()
+        print(f"🧹 Removed stale {SHARD_MANIFEST_PATH.relative_to(PROJECT_ROOT)}")
+    write_locale_font_manifest(manifest, UDSHINGO_FONTS + HARMONY_FONTS, routes)
+    if args.region_deltas:
+        build_region_deltas(manifest, charsets, jobs, layout_features, workers, use_cache)
+        save_cache_manifest(args.cache_dir, manifest)
+    elif manifest.get("deltas") or any((FONTS_DIR / "UD_ShinGo").glob("UDShinGo_*.stack.css")):
+        remove_region_deltas(manifest)
+        save_cache_manifest(args.cache_dir, manifest)
+    calibrate_size_tables(args.cache_dir, manifest, jobs, charsets, layout_features)
+
+    within_budget = True
+    if budgets:
+        print("\n📏 WOFF2 size budgets:")
+        built_sizes = {
+            font_path: manifest["fonts"][font_path]["outputs"][Path(font_path).with_suffix(".woff2").name]["size"]
+            for font_path, _ in jobs
+            if Path(font_path).with_suffix(".woff2").name in manifest["fonts"].get(font_path, {}).get("outputs", {})
+        }
+        within_budget = check_size_budgets(built_sizes, budgets, "WOFF2")
     
     print("\n" + "=" * 70)
-    print("✨ Font subsetting completed successfully!")
+    if within_budget:
+        print("✨ Font subsetting completed successfully!")
+    else:
+        print("❌ Font subsetting finished, but one or more fonts exceed their WOFF2 size budget")
     print("=" * 70)
     print(f"Original fonts backed up to: {ORIGINAL_FONTS_DIR.relative_to(PROJECT_ROOT)}")
     print(f"UD_ShinGo subset size: {len(locale_chars)} | HMSans subset size: {len(harmony_chars)}")
+    for region, chars in region_chars.items():
+        print(f"  {region}: {len(chars)} locale characters ({len(locale_chars) - len(chars)} fewer than the union)")
+    print(f"Cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    if not within_budget:
+        raise SystemExit(1)
+
+    if args.watch:
+        font_jobs = [(font_path, False) for font_path in UDSHINGO_FONTS]
+        font_jobs += [(font_path, True) for font_path in HARMONY_FONTS]
+        charset_by_font = dict(jobs)
+        built = {
+            font_path: charsets[charset_by_font[font_path]]["characters"]
+            for font_path, _ in font_jobs
+            if font_path in manifest["fonts"]
+        }
+        watch_locales(font_jobs, built, routes, files_chars, codepoint_cache, args.watch_interval, layout_features)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Self-test for src/locale/data/ui/schema.py
+==========================================
+Checks that the --stream checker agrees with the in-memory one: the same report for valid
+targets (small fixtures and every locale file under src/locale/data), and a load error from
+both for malformed JSON such as a member missing its comma. Also checks that the streaming
+parser's events rebuild the same value as json.loads, that --incremental replays the same
+verdict, and that the --serve request handler answers bad requests with an error reply.
+
+Usage:
+    python3 scripts/test-locale-schema.py
+"""
+
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+SCHEMA_SCRIPT = PROJECT_ROOT / "src" / "locale" / "data" / "ui" / "schema.py"
+
+TEMPLATE = {
+    "title": "<b>標題</b>",
+    "nav": {"home": "首頁", "help": "第一行\\n第二行"},
+    "items": [{"label": "<i>項目</i>"}, {"label": "其他"}],
+    "count": 3,
+}
+
+VALID_TARGETS = {
+    "same": TEMPLATE,
+    "missing-key": {"title": "<b>Title</b>", "nav": {"home": "Home"}, "items": [{"label": "<i>Item</i>"}], "count": 3},
+    "extra-key": dict(TEMPLATE, extra={"deep": "x"}),
+    "tag-mismatch": dict(TEMPLATE, title="<i>Title</i>"),
+    "type-mismatch": dict(TEMPLATE, nav="Home", items={"label": "x"}),
+    "wrong-root": ["not", "an", "object"],
+}
+
+# Each of these is rejected by json.loads, so both checkers must report a load error
+MALFORMED_TARGETS = {
+    "missing-comma": '{\n  "title": "<b>Title</b>"\n  "nav": {"home": "Home", "help": "a\\\\nb"},\n'
+                     '  "items": [], "count": 3\n}\n',
+    "missing-array-comma": '{"title": "t", "nav": {}, "items": [{"label": "a"} {"label": "b"}], "count": 3}',
+    "missing-colon": '{"title" "t", "nav": {}, "items": [], "count": 3}',
+    "trailing-comma": '{"title": "t", "nav": {}, "items": [], "count": 3,}',
+    "trailing-data": '{"title": "t", "nav": {}, "items": [], "count": 3} {}',
+    "mismatched-bracket": '{"title": "t", "nav": {], "items": [], "count": 3}',
+    "unclosed": '{"title": "t", "nav": {',
+    "empty": '',
+}
+
+
+def load_schema():
+    spec = importlib.util.spec_from_file_location("schema", SCHEMA_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rebuild(events) -> Any:
+    """Assemble the value an event stream describes, to compare with json.loads."""
+    root: List[Any] = [None]
+    containers = {(): root}
+    for kind, path, value, _, _ in events:
+        parent = containers[path[:-1]] if path else root
+        key = path[-1] if path else 0
+        node = {} if kind == "object" else [] if kind == "array" else value
+        if isinstance(parent, list) and path and key == len(parent):
+            parent.append(node)
+        else:
+            parent[key] = node
+        if kind in ("object", "array"):
+            containers[path] = node
+    return root[0]
+
+
+def run(schema, workdir: Path) -> List[Tuple[str, bool, str]]:
+    results: List[Tuple[str, bool, str]] = []
+
+    def check(name: str, test: Callable[[], str]):
+        try:
+            detail = test()
+            results.append((name, not detail, detail))
+        except Exception as e:
+            results.append((name, False, f"{type(e).__name__}: {e}"))
+
+    def compare(template_path: str, target_path: str) -> str:
+        template_data, template_index, template_formats = schema.load_template(template_path)
+        batch = schema.check_target(template_data, template_index, template_path, target_path,
+                                    False, None, template_formats)
+        stream = schema.stream_check_target(template_path, target_path, None)
+        if batch[:2] != stream[:2]:
+            return f"stream {stream[:2]!r} != batch {batch[:2]!r}"
+        return ""
+
+    def compare_malformed(template_path: str, target_path: str) -> str:
+        template_data, template_index, template_formats = schema.load_template(template_path)
+        batch = schema.check_target(template_data, template_index, template_path, target_path,
+                                    False, None, template_formats)
+        stream = schema.stream_check_target(template_path, target_path, None)
+        for label, (passed, output, _) in (("batch", batch), ("stream", stream)):
+            if passed or not output.startswith("❌ Error loading"):
+                return f"{label} accepted malformed JSON: {output[:200]!r}"
+        return ""
+
+    template_path = workdir / "zh-CN.json"
+    template_path.write_text(json.dumps(TEMPLATE, ensure_ascii=False, indent=2), encoding="utf-8")
+    for name, data in VALID_TARGETS.items():
+        path = workdir / f"{name}.json"
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        check(f"stream = batch: {name}", lambda p=path: compare(str(template_path), str(p)))
+    for name, text in MALFORMED_TARGETS.items():
+        path = workdir / f"{name}.json"
+        path.write_text(text, encoding="utf-8")
+        check(f"both reject: {name}", lambda p=path: compare_malformed(str(template_path), str(p)))
+
+    def events_match_json(text: str) -> str:
+        expected = json.loads(text)
+        for chunk_size in (1, 7, schema.STREAM_CHUNK_SIZE):
+            got = rebuild(schema.iter_json_events(io.StringIO(text), chunk_size))
+            if got != expected:
+                return f"chunk size {chunk_size}: {got!r} != {expected!r}"
+        return ""
+
+    for name, data in VALID_TARGETS.items():
+        check(f"events = json.loads: {name}", lambda d=data: events_match_json(json.dumps(d, ensure_ascii=False)))
+    check("events = json.loads: scalar root", lambda: events_match_json(' "a\\"b" '))
+
+    data_root = Path(schema.DEFAULT_DATA_ROOT)
+    for domain, domain_template in schema.find_domains(str(data_root)):
+        for target in schema.find_locale_files(domain_template):
+            check(f"stream = batch: {domain}/{Path(target).name}",
+                  lambda t=domain_template, p=target: compare(t, p))
+
+    def incremental_replay() -> str:
+        target = str(workdir / "tag-mismatch.json")
+        template_data, template_index, template_formats = schema.load_template(str(template_path))
+        first = schema.check_target(template_data, template_index, str(template_path), target,
+                                    False, None, template_formats, {})
+        replay = schema.check_target(template_data, template_index, str(template_path), target,
+                                     False, None, template_formats, first[2])
+        if first[:2] != replay[:2]:
+            return f"replayed {replay[:2]!r} != checked {first[:2]!r}"
+        return ""
+
+    check("incremental replay", incremental_replay)
+
+    def server_errors() -> str:
+        for line in ('{"file": 3}', '{"file": "x.json", "text": 1}', '[1, 2]', '{"file"', '{"cmd": "nope"}'):
+            reply = json.loads(schema.respond(line))
+            if reply.get("ok") is not False:
+                return f"{line!r} -> {reply!r}"
+        return ""
+
+    check("server rejects bad requests", server_errors)
+    return results
+
+
+def main() -> int:
+    schema = load_schema()
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(schema, Path(tmp))
+    failures = [(name, detail) for name, ok, detail in results if not ok]
+    for name, detail in failures:
+        print(f"❌ {name}: {detail}")
+    print(f"{len(results) - len(failures)}/{len(results)} checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
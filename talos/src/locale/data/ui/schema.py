@@ -7,13 +7,26 @@
 # Usage:
 #   Single file:  python schema.py --template zh-CN.json --target en-US.json [--fix] [--report report.txt]
 #   Batch mode:   python schema.py --template zh-CN.json --batch [--fix] [--report-dir reports]
+#   All domains:  python schema.py --all-domains [-j N] [--fix] [--report-dir reports]
+#   Server:       python schema.py --serve [--port N]   (JSON lines: {"file": "en-US.json"})
 
 import json
 import re
 import argparse
+import csv
+import hashlib
+import os
+import socketserver
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from html.parser import HTMLParser
-from typing import Any, List, Tuple, Dict, Optional
+from typing import IO, Any, Callable, Iterator, List, Tuple, Dict, Optional
 
 # --------- Inline HTML parsing (simplified) ----------
 class _TagParser(HTMLParser):
@@ -30,8 +43,14 @@ class _TagParser(HTMLParser):
     def handle_startendtag(self, tag, attrs):
         self.tokens.append(("self", tag, dict(attrs)))
 
-def extract_tag_signature(s: str) -> List[Tuple[str, str, Tuple[Tuple[str,str], ...]]]:
+TagSignature = List[Tuple[str, str, Tuple[Tuple[str,str], ...]]]
+InlineFormat = Tuple[TagSignature, List[int]]
+
+def extract_tag_signature(s: str) -> TagSignature:
     """Extract simplified tag token list from string: (type, tag, sorted(attrs tuple))"""
+    if "<" not in s:
+        # No markup, nothing for HTMLParser to find
+        return []
     p = _TagParser()
     try:
         p.feed(s)
@@ -46,6 +65,8 @@ def extract_tag_signature(s: str) -> List[Tuple[str, str, Tuple[Tuple[str,str],
 
 def newline_positions(s: str) -> List[int]:
     """Return list of all '\\n' index positions (for comparing newline positions)"""
+    if "\\n" not in s:
+        return []
     return [m.start() for m in re.finditer(r'\\n', s)]
 
 # --------- Structure comparison ----------
@@ -84,9 +105,45 @@ def diff_keys(base: Any, target: Any, path: str = "") -> Tuple[List[str], List[s
     return missing, extra
 
 # --------- Inline format comparison ----------
-def compare_inline_format(base: Any, target: Any) -> List[str]:
+def inline_format(s: str) -> InlineFormat:
+    return extract_tag_signature(s), newline_positions(s)
+
+def collect_inline_formats(base: Any) -> Dict[str, InlineFormat]:
+    """
+    Precompute the inline format of every template string compare_inline_format will visit, by path.
+    Lets batch runs parse the template once instead of once per target locale.
+    """
+    formats: Dict[str, InlineFormat] = {}
+    def walk(b: Any, path: str):
+        if isinstance(b, str):
+            formats[path] = inline_format(b)
+        elif isinstance(b, dict):
+            for k, v in b.items():
+                walk(v, f"{path}.{k}" if path else k)
+        elif isinstance(b, list) and len(b) > 0:
+            walk(b[0], f"{path}[0]")
+    walk(base, "")
+    return formats
+
+def compare_string_format(path: str, base_format: InlineFormat, target: str) -> List[str]:
+    """Compare one target string against a template string's precomputed inline format."""
+    problems: List[str] = []
+    b_tags, b_nl = base_format
+    t_tags = extract_tag_signature(target)
+    if b_tags != t_tags:
+        problems.append(f"{path}: HTML tag/token mismatch\n  template tokens={b_tags}\n  target tokens  ={t_tags}")
+    t_nl = newline_positions(target)
+    if b_nl != t_nl:
+        problems.append(f"{path}: newline positions differ -> template {b_nl} target {t_nl}")
+    return problems
+
+def compare_inline_format(base: Any, target: Any,
+                          base_formats: Optional[Dict[str, InlineFormat]] = None,
+                          path: str = "") -> List[str]:
     """
     Recursively compare HTML tag tokens and \\n positions in strings.
+    base_formats (from collect_inline_formats) skips re-parsing the template strings;
+    path is the key path of base when comparing a subtree.
     Return list of issue descriptions (each with path prefix)
     """
     problems: List[str] = []
@@ -95,14 +152,8 @@ def compare_inline_format(base: Any, target: Any) -> List[str]:
             if not isinstance(t, str):
                 problems.append(f"{path}: type mismatch (template is string, target not string)")
                 return
-            b_tags = extract_tag_signature(b)
-            t_tags = extract_tag_signature(t)
-            if b_tags != t_tags:
-                problems.append(f"{path}: HTML tag/token mismatch\n  template tokens={b_tags}\n  target tokens  ={t_tags}")
-            b_nl = newline_positions(b)
-            t_nl = newline_positions(t)
-            if b_nl != t_nl:
-                problems.append(f"{path}: newline positions differ -> template {b_nl} target {t_nl}")
+            b_fmt = base_formats[path] if base_formats is not None else inline_format(b)
+            problems.extend(compare_string_format(path, b_fmt, t))
         elif isinstance(b, dict):
             if not isinstance(t, dict):
                 problems.append(f"{path}: type mismatch (template is object, target not object)")
@@ -119,31 +170,70 @@ def compare_inline_format(base: Any, target: Any) -> List[str]:
             if len(b) > 0 and len(t) > 0:
                 walk(b[0], t[0], f"{path}[0]")
 
-    walk(base, target, "")
+    walk(base, target, path)
     return problems
 
-# --------- Line number location (approximate) ----------
-def find_key_line(source_text: str, key_path: str) -> Optional[int]:
-    """
-    Find keys in path sequentially in original JSON text, return approximate line number (1-based).
-    Simple approach: for each key in path, search for next occurrence, return line of last key.
-    If any key not found, return None.
-    """
-    keys = key_path.split(".")
-    pos = 0
-    for k in keys:
-        # Search for "k" :
-        m = re.search(r'\"' + re.escape(k) + r'\"\s*:', source_text[pos:])
-        if not m:
-            # Fallback: search for just "k"
-            m2 = re.search(r'\"' + re.escape(k) + r'\"', source_text[pos:])
-            if not m2:
-                return None
-            pos += m2.start()
+# --------- Line number location (exact) ----------
+KeyIndex = Dict[str, Tuple[int, int]]
+
+_JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\],:]|[^\s{}\[\],:"]+')
+
+def build_key_index(source_text: str) -> KeyIndex:
+    """
+    Map every key path to the (line, column) of its key in one tokenizing pass (both 1-based).
+    Object members use dot paths like diff_keys ("guide.sidebarToggle"); array items use
+    "path[i]" like compare_inline_format and point at the item's value.
+    Expects text json.loads already accepted; duplicate keys resolve to the last one, as in json.
+    """
+    line_starts = [0] + [m.end() for m in re.finditer("\n", source_text)]
+    index: KeyIndex = {}
+
+    def locate(pos: int) -> Tuple[int, int]:
+        line = bisect_right(line_starts, pos)
+        return line, pos - line_starts[line - 1] + 1
+
+    # Frames: [kind, path, key or item index, expecting a key (objects only)]
+    stack: List[list] = []
+    for m in _JSON_TOKEN.finditer(source_text):
+        tok = m.group()
+        frame = stack[-1] if stack else None
+        if frame is not None and frame[0] == "obj" and frame[3] and tok[0] == '"':
+            key = json.loads(tok) if "\\" in tok else tok[1:-1]
+            frame[2] = key
+            frame[3] = False
+            index[f"{frame[1]}.{key}" if frame[1] else key] = locate(m.start())
+            continue
+        if tok == ",":
+            if frame is not None and frame[0] == "obj":
+                frame[3] = True
+            elif frame is not None:
+                frame[2] += 1
+            continue
+        if tok in ("}", "]"):
+            stack.pop()
+            continue
+        if tok == ":":
+            continue
+        # A value: work out its path, and record array items
+        if frame is None:
+            path = ""
+        elif frame[0] == "obj":
+            path = f"{frame[1]}.{frame[2]}" if frame[1] else frame[2]
         else:
-            pos += m.start()
-    # Count '\n' before pos to get line number
-    return source_text.count("\n", 0, pos) + 1
+            path = f"{frame[1]}[{frame[2]}]"
+            index[path] = locate(m.start())
+        if tok == "{":
+            stack.append(["obj", path, None, True])
+        elif tok == "[":
+            stack.append(["arr", path, 0, False])
+    return index
+
+def format_location(index: KeyIndex, key_path: str) -> str:
+    """"line L, col C" for a key path, or "-" when the path is not in the file."""
+    return format_position(index.get(key_path))
+
+def format_position(loc: Optional[Tuple[int, int]]) -> str:
+    return f"line {loc[0]}, col {loc[1]}" if loc else "-"
 
 # --------- Rebuild from template (preserve target values, reorder & fill gaps) ----------
 def build_ordered_from_template(template: Any, target: Any) -> Any:
@@ -180,11 +270,12 @@ def build_ordered_from_template(template: Any, target: Any) -> Any:
     return out
 
 # --------- File loading and processing ----------
-def load_file(path: str) -> Tuple[Any, str]:
+def load_file(path: str) -> Tuple[Any, str, KeyIndex]:
+    """Return (data, text, key index) for a JSON file."""
     with open(path, "r", encoding="utf-8") as f:
         text = f.read()
     data = json.loads(text)
-    return data, text
+    return data, text, build_key_index(text)
 
 def find_locale_files(template_path: str) -> List[str]:
     """
@@ -202,20 +293,210 @@ def find_locale_files(template_path: str) -> List[str]:
     
     return sorted(locale_files)
 
-def process_single_target(template_data: Any, template_text: str, template_path: str,
-                          target_path: str, fix: bool, report_path: Optional[str]) -> bool:
+# --------- Parallel batch ----------
+TEMPLATE_LOCALE = "zh-CN"
+DEFAULT_DATA_ROOT = Path(__file__).resolve().parent.parent
+
+def find_domains(data_root: str) -> List[Tuple[str, str]]:
     """
-    Process a single target file. Returns True if all checks passed.
+    Find every locale domain (ui, game, region, ...) under data_root and its template file.
+    Template names differ in case between domains (zh-CN.json vs zh-cn.json), so match case-insensitively.
+    Returns sorted list of (domain, template path).
+    """
+    domains = []
+    for directory in sorted(Path(data_root).iterdir()):
+        if not directory.is_dir():
+            continue
+        for file in sorted(directory.glob("*.json")):
+            if file.stem.lower() == TEMPLATE_LOCALE.lower():
+                domains.append((directory.name, str(file)))
+                break
+    return domains
+
+# Per-process template cache, so each worker parses a domain's template once
+_TEMPLATES: Dict[str, Tuple[Any, KeyIndex, Dict[str, InlineFormat]]] = {}
+# Template path -> (file hash, section hashes), for --incremental
+_TEMPLATE_HASHES: Dict[str, Tuple[str, Dict[str, str]]] = {}
+
+def load_template(template_path: str) -> Tuple[Any, KeyIndex, Dict[str, InlineFormat]]:
+    """Return (data, key index, inline formats) for a template, parsed once per process."""
+    if template_path not in _TEMPLATES:
+        data, text, index = load_file(template_path)
+        _TEMPLATES[template_path] = (data, index, collect_inline_formats(data))
+        _TEMPLATE_HASHES[template_path] = (content_hash(text), section_hashes(data))
+    return _TEMPLATES[template_path]
+
+TargetJob = Tuple[str, str, bool, Optional[str], Optional[Dict[str, Any]]]
+
+def check_target_job(job: TargetJob) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    """
+    Worker entry point: (template path, target path, fix, report path, previous cache entry)
+    -> (passed, output, new cache entry). The previous entry is None when not running incrementally.
     """
+    template_path, target_path, fix, report_path, previous = job
     try:
-        tgt, tgt_text = load_file(target_path)
+        template_data, template_index, template_formats = load_template(template_path)
     except Exception as e:
-        print(f"❌ Error loading {target_path}: {e}")
-        return False
+        return False, f"❌ Error loading template {template_path}: {e}", None
+    return check_target(template_data, template_index, template_path, target_path, fix, report_path,
+                        template_formats, previous)
 
-    missing, extra = diff_keys(template_data, tgt)
-    inline_problems = compare_inline_format(template_data, tgt)
+# Below this many files to parse, starting workers (each parsing its templates again) costs more
+# than checking the files in this process
+MIN_PARALLEL_JOBS = 4
+
+def needs_parsing(job: TargetJob, template_hashes: Dict[str, str]) -> bool:
+    """False when --incremental will replay the job's whole cached verdict (see check_target)."""
+    template_path, target_path, fix, _, previous = job
+    if not previous or fix:
+        return True
+    try:
+        if template_path not in template_hashes:
+            template_hashes[template_path] = content_hash(Path(template_path).read_text(encoding="utf-8"))
+        target_hash = content_hash(Path(target_path).read_text(encoding="utf-8"))
+    except OSError:
+        return True
+    return (previous.get("template") != template_path
+            or previous.get("templateHash") != template_hashes[template_path]
+            or previous.get("hash") != target_hash)
+
+def auto_workers(jobs: List[TargetJob]) -> int:
+    """Worker count for -j auto: one process unless enough files actually need parsing."""
+    template_hashes: Dict[str, str] = {}
+    pending = sum(1 for job in jobs if needs_parsing(job, template_hashes))
+    if pending < MIN_PARALLEL_JOBS:
+        return 1
+    return min(os.cpu_count() or 1, pending)
+
+def run_target_jobs(jobs: List[TargetJob], workers: Optional[int],
+                    worker: Callable[[TargetJob], Tuple[bool, str, Optional[Dict[str, Any]]]] = check_target_job
+                    ) -> Tuple[bool, Dict[str, Dict[str, Any]]]:
+    """
+    Check all jobs with worker, in a process pool when workers > 1 (None picks auto_workers).
+    Output is printed in job order regardless of which worker finishes first.
+    Returns (all passed, new cache entries by target path).
+    """
+    all_passed = True
+    entries: Dict[str, Dict[str, Any]] = {}
+    if workers is None:
+        workers = auto_workers(jobs)
+    if workers <= 1 or len(jobs) <= 1:
+        results = map(worker, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        results = executor.map(worker, jobs)
+    try:
+        for job, (passed, output, entry) in zip(jobs, results):
+            print(output)
+            all_passed = all_passed and passed
+            if entry is not None:
+                entries[job[1]] = entry
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return all_passed, entries
+
+# --------- Incremental cache ----------
+SCHEMA_CACHE_VERSION = 1
+
+def default_cache_path() -> Path:
+    """
+    talos/node_modules/.cache/i18n-schema.json when this script sits in talos/src/locale/data/ui,
+    otherwise a file next to the data root (copies of the script can live anywhere).
+    """
+    parents = DEFAULT_DATA_ROOT.parents
+    if len(parents) >= 3:
+        return parents[2] / "node_modules" / ".cache" / "i18n-schema.json"
+    return DEFAULT_DATA_ROOT / ".i18n-schema-cache.json"
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def section_hashes(data: Any) -> Dict[str, str]:
+    """Hash each top-level section; key order counts, since it changes report order."""
+    if not isinstance(data, dict):
+        return {}
+    return {k: content_hash(json.dumps(v, ensure_ascii=False, separators=(",", ":")))
+            for k, v in data.items()}
+
+def load_schema_cache(cache_path: Path) -> Dict[str, Any]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == SCHEMA_CACHE_VERSION:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {"version": SCHEMA_CACHE_VERSION, "targets": {}}
+
+def save_schema_cache(cache_path: Path, cache: Dict[str, Any]):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+    tmp_path.replace(cache_path)
+
+def cached_entry(cache: Optional[Dict[str, Any]], target_path: str) -> Optional[Dict[str, Any]]:
+    """Previous entry for a target ({} if none), or None when not running incrementally."""
+    if cache is None:
+        return None
+    return cache["targets"].get(str(Path(target_path).resolve()), {})
+
+def update_schema_cache(cache_path: Path, cache: Dict[str, Any], entries: Dict[str, Dict[str, Any]]):
+    for target_path, entry in entries.items():
+        cache["targets"][str(Path(target_path).resolve())] = entry
+    save_schema_cache(cache_path, cache)
+
+def check_sections(template_data: Dict[str, Any], tgt: Dict[str, Any],
+                   template_formats: Optional[Dict[str, InlineFormat]],
+                   template_hashes: Dict[str, str], previous_sections: Dict[str, Any]
+                   ) -> Tuple[List[str], List[str], List[str], Dict[str, Any], int]:
+    """
+    diff_keys + compare_inline_format one top-level section at a time, replaying the cached verdict
+    of every section whose template and target hashes are unchanged. Results are in the same order
+    as a full check. Returns (missing, extra, inline problems, section verdicts, sections reused).
+    """
+    missing: List[str] = []
+    extra: List[str] = []
+    problems: List[str] = []
+    sections: Dict[str, Any] = {}
+    reused = 0
+    target_hashes = section_hashes(tgt)
+    for k, v in template_data.items():
+        if k not in tgt:
+            missing.append(k)
+            continue
+        hashes = [template_hashes[k], target_hashes[k]]
+        verdict = previous_sections.get(k)
+        if verdict is not None and verdict["hashes"] == hashes:
+            reused += 1
+        else:
+            m, e = diff_keys(v, tgt[k], k)
+            verdict = {"hashes": hashes, "missing": m, "extra": e,
+                       "problems": compare_inline_format(v, tgt[k], template_formats, k)}
+        sections[k] = verdict
+        missing.extend(verdict["missing"])
+        extra.extend(verdict["extra"])
+        problems.extend(verdict["problems"])
+    extra.extend(k for k in tgt if k not in template_data)
+    return missing, extra, problems, sections, reused
+
+# --------- Single target ----------
+def process_single_target(template_data: Any, template_index: KeyIndex, template_path: str,
+                          target_path: str, fix: bool, report_path: Optional[str]) -> bool:
+    """
+    Process a single target file. Returns True if all checks passed.
+    """
+    passed, output, _ = check_target(template_data, template_index, template_path, target_path, fix, report_path)
+    print(output)
+    return passed
 
+def build_report(template_path: str, target_path: str, missing: List[Tuple[str, str]],
+                 extra: List[Tuple[str, str]], inline_problems: List[Tuple[str, str]]) -> Tuple[bool, str]:
+    """
+    Render the textual report from (item, location) pairs. Returns (all checks passed, report).
+    """
     report_lines: List[str] = []
     report_lines.append(f"Template: {template_path}")
     report_lines.append(f"Target: {target_path}")
@@ -227,18 +508,16 @@ def process_single_target(template_data: Any, template_text: str, template_path:
     if missing:
         all_passed = False
         report_lines.append("Missing keys:")
-        for k in missing:
-            ln = find_key_line(template_text, k) or -1
-            report_lines.append(f"  - {k}  (template line {ln})")
+        for k, loc in missing:
+            report_lines.append(f"  - {k}  (template {loc})")
     else:
         report_lines.append("No missing keys ✅")
     
     if extra:
         all_passed = False
         report_lines.append("Extra keys in target:")
-        for k in extra:
-            ln = find_key_line(tgt_text, k) or -1
-            report_lines.append(f"  - {k}  (target line {ln})")
+        for k, loc in extra:
+            report_lines.append(f"  - {k}  (target {loc})")
     else:
         report_lines.append("No extra keys ✅")
 
@@ -247,30 +526,590 @@ def process_single_target(template_data: Any, template_text: str, template_path:
     if inline_problems:
         all_passed = False
         report_lines.append("Found inline format problems:")
-        for p in inline_problems:
-            try_path = p.split(":")[0]
-            pathline = find_key_line(template_text, try_path) or "-"
-            report_lines.append(f"  - {p}  (template line {pathline})")
+        for p, loc in inline_problems:
+            report_lines.append(f"  - {p}  (template {loc})")
     else:
         report_lines.append("No inline format problems ✅")
 
-    report = "\n".join(report_lines)
-    print("\n" + "="*80)
-    print(report)
+    return all_passed, "\n".join(report_lines)
+
+def check_target(template_data: Any, template_index: KeyIndex, template_path: str,
+                 target_path: str, fix: bool, report_path: Optional[str],
+                 template_formats: Optional[Dict[str, InlineFormat]] = None,
+                 previous: Optional[Dict[str, Any]] = None) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    """
+    Check a single target file. Returns (all checks passed, console output, cache entry).
+    Pass the target's previous cache entry (or {}) to check incrementally; otherwise the entry is None.
+    """
+    entry = None
+    output = ["\n" + "="*80]
+    if previous is not None:
+        template_hash, template_sections = _TEMPLATE_HASHES.get(template_path) or ("", {})
+        try:
+            with open(target_path, "r", encoding="utf-8") as f:
+                text_hash = content_hash(f.read())
+        except OSError as e:
+            return False, f"❌ Error loading {target_path}: {e}", None
+        entry = {"template": template_path, "templateHash": template_hash, "hash": text_hash}
+        unchanged = all(previous.get(k) == v for k, v in entry.items())
+        if unchanged and not fix:
+            # Neither file changed: replay the whole verdict without parsing the target
+            output.append(previous["report"])
+            if report_path:
+                with open(report_path, "w", encoding="utf-8") as f:
+                    f.write(previous["report"])
+                output.append(f"Report written to {report_path}")
+            return previous["passed"], "\n".join(output), previous
+
+    try:
+        tgt, _, tgt_index = load_file(target_path)
+    except Exception as e:
+        return False, f"❌ Error loading {target_path}: {e}", None
+
+    if entry is not None and isinstance(template_data, dict) and isinstance(tgt, dict):
+        # Section verdicts are keyed by both sides' hashes, so they survive edits elsewhere in the template
+        missing, extra, inline_problems, sections, reused = check_sections(
+            template_data, tgt, template_formats, template_sections, previous.get("sections", {}))
+        entry["sections"] = sections
+        if reused:
+            output.append(f"♻️  Reused {reused}/{len(sections)} cached section verdict(s) for {target_path}")
+    else:
+        missing, extra = diff_keys(template_data, tgt)
+        inline_problems = compare_inline_format(template_data, tgt, template_formats)
+
+    all_passed, report = build_report(
+        template_path, target_path,
+        [(k, format_location(template_index, k)) for k in missing],
+        [(k, format_location(tgt_index, k)) for k in extra],
+        [(p, format_location(template_index, p.split(":")[0])) for p in inline_problems])
+    output.append(report)
+    if entry is not None:
+        entry["passed"] = all_passed
+        entry["report"] = report
 
     if report_path:
         with open(report_path, "w", encoding="utf-8") as f:
             f.write(report)
-        print(f"Report written to {report_path}")
+        output.append(f"Report written to {report_path}")
 
     if fix:
         fixed = build_ordered_from_template(template_data, tgt)
         out_path = target_path + ".fixed.json"
         with open(out_path, "w", encoding="utf-8") as f:
             json.dump(fixed, f, ensure_ascii=False, indent=2)
-        print(f"Fixed file written to {out_path}")
+        output.append(f"Fixed file written to {out_path}")
     
-    return all_passed
+    return all_passed, "\n".join(output), entry
+
+# --------- Streaming validation ----------
+# Streams the template into a compact shape (kind, position, inline format per path; no string values),
+# then streams the target against it, so memory follows the key count rather than the file size.
+STREAM_CHUNK_SIZE = 1 << 16
+
+_STREAM_TOKEN = re.compile(r'\s+|"(?:[^"\\]|\\.)*"|[{}\[\],:]|[^\s{}\[\],:"]+')
+
+JsonPath = Tuple[Any, ...]
+JsonEvent = Tuple[str, JsonPath, Any, int, int]
+
+def iter_json_events(f: IO[str], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[JsonEvent]:
+    """
+    Incrementally parse a JSON text stream into (kind, path, value, line, col) events, one per value.
+    kind is "object", "array", "string" or "scalar" (value is only set for the last two); path is a
+    tuple of keys and item indexes. line/col (1-based) point at the member's key, or at the value for
+    array items and the root, same as build_key_index.
+    Raises ValueError with the line/column of the first token out of order (a missing comma or colon,
+    a mismatched bracket, trailing data), so malformed files fail as they do with json.loads.
+    """
+    buf = ""
+    offset = 0  # absolute offset of buf[0]
+    line, line_start = 1, 0
+    # Frames: [is object, path, key or item index, expected token, key position]; the expected token
+    # is "first" (key/value or close), "key", "colon", "value" or "end" (comma or close)
+    stack: List[list] = []
+    root_done = False
+    eof = False
+    while not eof:
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf += chunk
+        pos = 0
+        while pos < len(buf):
+            m = _STREAM_TOKEN.match(buf, pos)
+            if m is None or (m.end() == len(buf) and not eof):
+                # Token may continue in the next chunk
+                break
+            tok = m.group()
+            start = offset + pos
+            pos = m.end()
+            c = tok[0]
+            if c.isspace():
+                newlines = tok.count("\n")
+                if newlines:
+                    line += newlines
+                    line_start = start + tok.rindex("\n") + 1
+                continue
+            col = start - line_start + 1
+            frame = stack[-1] if stack else None
+            expected = frame[3] if frame is not None else ("done" if root_done else "value")
+            if c in "}]":
+                if frame is None or frame[0] != (c == "}") or expected not in ("first", "end"):
+                    raise ValueError(f"Unexpected {tok!r} at line {line}, column {col}")
+                stack.pop()
+                continue
+            if c == ",":
+                if expected != "end":
+                    raise ValueError(f"Unexpected ',' at line {line}, column {col}")
+                if frame[0]:
+                    frame[3] = "key"
+                else:
+                    frame[2] += 1
+                    frame[3] = "value"
+                continue
+            if c == ":":
+                if expected != "colon":
+                    raise ValueError(f"Unexpected ':' at line {line}, column {col}")
+                frame[3] = "value"
+                continue
+            if frame is not None and frame[0] and expected in ("first", "key"):
+                if c != '"':
+                    raise ValueError(f"Expected a key at line {line}, column {col}, got {tok[:20]!r}")
+                frame[2] = json.loads(tok) if "\\" in tok else tok[1:-1]
+                frame[3] = "colon"
+                frame[4] = (line, col)
+                continue
+            if expected not in ("first", "value"):
+                what = {"done": "trailing data", "colon": "missing ':'"}.get(expected, "missing ','")
+                raise ValueError(f"Unexpected {tok[:20]!r} at line {line}, column {col} ({what})")
+            if frame is None:
+                path, loc = (), (line, col)
+                root_done = True
+            elif frame[0]:
+                path, loc = frame[1] + (frame[2],), frame[4]
+                frame[3] = "end"
+            else:
+                path, loc = frame[1] + (frame[2],), (line, col)
+                frame[3] = "end"
+            if c == "{":
+                stack.append([True, path, None, "first", None])
+                yield "object", path, None, loc[0], loc[1]
+            elif c == "[":
+                stack.append([False, path, 0, "first", None])
+                yield "array", path, None, loc[0], loc[1]
+            elif c == '"':
+                yield "string", path, (json.loads(tok) if "\\" in tok else tok[1:-1]), loc[0], loc[1]
+            else:
+                try:
+                    value = json.loads(tok)
+                except ValueError:
+                    raise ValueError(f"Invalid value {tok[:20]!r} at line {line}, column {col}") from None
+                yield "scalar", path, value, loc[0], loc[1]
+        offset += pos
+        buf = buf[pos:]
+    if buf.strip() or stack or not root_done:
+        raise ValueError(f"Unexpected end of JSON at line {line}")
+
+def render_path(path: JsonPath) -> str:
+    """Tuple path -> the dot/[i] notation used by diff_keys and compare_inline_format."""
+    out = ""
+    for part in path:
+        if isinstance(part, int):
+            out += f"[{part}]"
+        else:
+            out += f".{part}" if out else part
+    return out
+
+# Path -> [kind, (line, col) or None, inline format (strings), child keys (objects)]
+TemplateShape = Dict[JsonPath, list]
+
+_SHAPES: Dict[str, TemplateShape] = {}
+
+def load_template_shape(template_path: str) -> TemplateShape:
+    """
+    Stream a template into its shape, once per process. Only the first item of each array is kept,
+    as compare_inline_format only looks at that one.
+    """
+    if template_path in _SHAPES:
+        return _SHAPES[template_path]
+    shape: TemplateShape = {}
+    with open(template_path, "r", encoding="utf-8") as f:
+        for kind, path, value, line, col in iter_json_events(f):
+            if path:
+                parent = shape.get(path[:-1])
+                if parent is None or (isinstance(path[-1], int) and path[-1] > 0):
+                    continue
+                if parent[3] is not None and path not in shape:
+                    parent[3].append(path[-1])
+            fmt = inline_format(value) if kind == "string" else None
+            # The root has no key, so no location (as in build_key_index)
+            shape[path] = [kind, (line, col) if path else None, fmt, [] if kind == "object" else None]
+    _SHAPES[template_path] = shape
+    return shape
+
+def stream_check_target(template_path: str, target_path: str,
+                        report_path: Optional[str]) -> Tuple[bool, str, None]:
+    """
+    Streaming counterpart of check_target: same report, without holding either file in memory.
+    Inline formats are compared as target strings arrive; the structure verdict is assembled in
+    template order at the end so the report matches the non-streaming one.
+    """
+    try:
+        shape = load_template_shape(template_path)
+    except Exception as e:
+        return False, f"❌ Error loading template {template_path}: {e}", None
+
+    target_kinds: Dict[JsonPath, str] = {}
+    extras: Dict[JsonPath, List[Tuple[str, str]]] = {}
+    string_problems: Dict[JsonPath, List[str]] = {}
+    try:
+        with open(target_path, "r", encoding="utf-8") as f:
+            for kind, path, value, line, col in iter_json_events(f):
+                if path:
+                    parent = path[:-1]
+                    # Only descend where the target matches the template's container type
+                    if parent not in shape or target_kinds.get(parent) != shape[parent][0]:
+                        continue
+                    if isinstance(path[-1], int) and path[-1] > 0:
+                        continue
+                    if path not in shape:
+                        # diff_keys does not look inside arrays
+                        if shape[parent][0] == "object" and not any(isinstance(p, int) for p in parent):
+                            extras.setdefault(parent, []).append(
+                                (render_path(path), format_position((line, col))))
+                        continue
+                elif path not in shape:
+                    continue
+                target_kinds[path] = kind
+                if kind == "string" and shape[path][0] == "string":
+                    problems = compare_string_format(render_path(path), shape[path][2], value)
+                    if problems:
+                        string_problems[path] = problems
+    except Exception as e:
+        return False, f"❌ Error loading {target_path}: {e}", None
+
+    missing: List[Tuple[str, str]] = []
+    extra: List[Tuple[str, str]] = []
+    inline_problems: List[Tuple[str, str]] = []
+
+    def diff_walk(path: JsonPath):
+        kind, loc, _, children = shape[path]
+        tkind = target_kinds.get(path)
+        if kind in ("string", "scalar"):
+            return
+        if kind == "array":
+            if tkind != "array":
+                missing.append((render_path(path) or "<root> (array expected)", format_position(loc)))
+            return
+        if tkind != "object":
+            missing.append((render_path(path) or "<root> (object expected)", format_position(loc)))
+            return
+        for k in children:
+            sub = path + (k,)
+            if sub not in target_kinds:
+                missing.append((render_path(sub), format_position(shape[sub][1])))
+            else:
+                diff_walk(sub)
+        extra.extend(extras.get(path, []))
+
+    def inline_walk(path: JsonPath):
+        kind, loc, _, children = shape[path]
+        tkind = target_kinds.get(path)
+        where = format_position(loc)
+        if kind == "string":
+            if tkind != "string":
+                inline_problems.append(
+                    (f"{render_path(path)}: type mismatch (template is string, target not string)", where))
+            else:
+                inline_problems.extend((p, where) for p in string_problems.get(path, []))
+        elif kind == "object":
+            if tkind != "object":
+                inline_problems.append(
+                    (f"{render_path(path)}: type mismatch (template is object, target not object)", where))
+                return
+            for k in children:
+                if path + (k,) in target_kinds:
+                    inline_walk(path + (k,))
+        elif kind == "array":
+            if tkind != "array":
+                inline_problems.append(
+                    (f"{render_path(path)}: type mismatch (template is array, target not array)", where))
+                return
+            if path + (0,) in shape and path + (0,) in target_kinds:
+                inline_walk(path + (0,))
+
+    if () in shape:
+        diff_walk(())
+        inline_walk(())
+
+    all_passed, report = build_report(template_path, target_path, missing, extra, inline_problems)
+    output = ["\n" + "="*80, report]
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(report)
+        output.append(f"Report written to {report_path}")
+    return all_passed, "\n".join(output), None
+
+def stream_check_target_job(job: TargetJob) -> Tuple[bool, str, None]:
+    """Worker entry point for --stream; ignores the job's fix flag and cache entry."""
+    template_path, target_path, _, report_path, _ = job
+    return stream_check_target(template_path, target_path, report_path)
+
+# --------- Coverage matrix ----------
+# Cell codes, one character per key and locale
+COVERAGE_CODES = {
+    "T": "translated",
+    "S": "same as template (untranslated copy)",
+    "E": "empty",
+    "M": "missing",
+    "X": "extra (not in template)",
+    "-": "not applicable (key neither in template nor locale)",
+}
+
+def iter_leaves(data: Any, path: str = "") -> Iterator[Tuple[str, Any]]:
+    """Yield (key path, value) for every leaf, treating arrays as leaves like diff_keys does."""
+    if isinstance(data, dict):
+        for k, v in data.items():
+            yield from iter_leaves(v, f"{path}.{k}" if path else k)
+    else:
+        yield path, data
+
+def value_hash(value: Any) -> int:
+    """Non-zero 32-bit hash of a leaf value; 0 is reserved for "absent"."""
+    return zlib.crc32(json.dumps(value, ensure_ascii=False).encode("utf-8")) or 1
+
+EMPTY_HASH = value_hash("")
+
+def canonical_locale(stem: str) -> str:
+    """en-us / en-US -> en-US, so domains with different file-name casing share columns."""
+    lang, _, region = stem.partition("-")
+    return f"{lang.lower()}-{region.upper()}" if region else lang.lower()
+
+def build_coverage_matrix(template_path: str) -> Dict[str, Any]:
+    """
+    Read a domain's template and every locale file once, interning leaf key paths into a shared index.
+    Each file becomes one column of value hashes (array of uint32, 0 = absent) aligned to that index,
+    which is then reduced to a status code string per locale.
+    """
+    key_ids: Dict[str, int] = {}
+    keys: List[str] = []
+    columns: Dict[str, array] = {}
+    files = [(TEMPLATE_LOCALE, template_path)] + [
+        (canonical_locale(Path(p).stem), p) for p in find_locale_files(template_path)]
+    for locale, path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        column = array("I", bytes(4 * len(keys)))
+        for key, value in iter_leaves(data):
+            key_id = key_ids.get(key)
+            if key_id is None:
+                key_id = key_ids[key] = len(keys)
+                keys.append(key)
+                column.append(0)
+            column[key_id] = value_hash(value)
+        columns[locale] = column
+
+    template = columns.pop(TEMPLATE_LOCALE)
+    template_size = len(template)
+    locales: Dict[str, Any] = {}
+    for locale, column in columns.items():
+        column.extend([0] * (len(keys) - len(column)))
+        codes = []
+        for key_id, h in enumerate(column):
+            if key_id >= template_size or template[key_id] == 0:
+                codes.append("X" if h else "-")
+            elif h == 0:
+                codes.append("M")
+            elif h == EMPTY_HASH:
+                codes.append("E")
+            elif h == template[key_id]:
+                codes.append("S")
+            else:
+                codes.append("T")
+        status = "".join(codes)
+        locales[locale] = {
+            "status": status,
+            "counts": {code: status.count(code) for code in "TSEMX"},
+            "coverage": round(status.count("T") / template_size, 4) if template_size else 1.0,
+        }
+    return {"template": template_path, "keys": keys, "templateKeys": template_size, "locales": locales}
+
+def write_coverage_matrix(out_path: Path, domains: Dict[str, Dict[str, Any]]):
+    """Write the key x locale matrix: JSON (columnar status strings) or CSV (one row per key)."""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix.lower() == ".json":
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"codes": COVERAGE_CODES, "domains": domains}, f, ensure_ascii=False, indent=2)
+        return
+    all_locales = sorted({locale for matrix in domains.values() for locale in matrix["locales"]})
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["domain", "key"] + all_locales)
+        for domain, matrix in domains.items():
+            statuses = [matrix["locales"].get(locale, {}).get("status") for locale in all_locales]
+            for key_id, key in enumerate(matrix["keys"]):
+                writer.writerow([domain, key] + [s[key_id] if s else "" for s in statuses])
+
+def print_coverage_summary(domains: Dict[str, Dict[str, Any]]):
+    for domain, matrix in domains.items():
+        print(f"\n📊 {domain}: {matrix['templateKeys']} template key(s), {len(matrix['locales'])} locale(s)")
+        print(f"  {'locale':<8} {'coverage':>8}  " + "  ".join(f"{code:>5}" for code in "TSEMX"))
+        for locale, info in sorted(matrix["locales"].items()):
+            counts = info["counts"]
+            print(f"  {locale:<8} {info['coverage']:>8.1%}  " + "  ".join(f"{counts[code]:>5}" for code in "TSEMX"))
+
+# --------- Server mode ----------
+# Keeps templates (with inline formats) and target trees in memory, reloading files whose mtime changed,
+# and answers one JSON request per line on stdin or a localhost TCP port.
+DEFAULT_POLL_INTERVAL = 0.5
+
+_TARGETS: Dict[str, Tuple[float, Any, KeyIndex]] = {}
+_TEMPLATE_MTIMES: Dict[str, float] = {}
+_SERVER_LOCK = threading.Lock()
+
+def log(message: str):
+    # stdout carries protocol responses in server mode
+    print(message, file=sys.stderr, flush=True)
+
+def template_for(file_path: Path) -> Optional[str]:
+    for file in sorted(file_path.parent.glob("*.json")):
+        if file.stem.lower() == TEMPLATE_LOCALE.lower():
+            return str(file.resolve())
+    return None
+
+def refresh_template(template_path: str) -> Tuple[Any, KeyIndex, Dict[str, InlineFormat]]:
+    """load_template, dropping the cached copy first if the file changed on disk."""
+    mtime = os.stat(template_path).st_mtime
+    if _TEMPLATE_MTIMES.get(template_path) != mtime:
+        _TEMPLATES.pop(template_path, None)
+        _TEMPLATE_HASHES.pop(template_path, None)
+        _TEMPLATE_MTIMES[template_path] = mtime
+    return load_template(template_path)
+
+def refresh_target(target_path: str, text: Optional[str] = None) -> Tuple[Any, KeyIndex]:
+    """Cached target tree; text (an unsaved editor buffer) is checked as-is and not cached."""
+    if text is not None:
+        return json.loads(text), build_key_index(text)
+    mtime = os.stat(target_path).st_mtime
+    cached = _TARGETS.get(target_path)
+    if cached is None or cached[0] != mtime:
+        data, _, index = load_file(target_path)
+        cached = _TARGETS[target_path] = (mtime, data, index)
+    return cached[1], cached[2]
+
+def validate_target(template_path: str, target_path: str, text: Optional[str] = None) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"target": target_path}
+    try:
+        template_data, template_index, template_formats = refresh_template(template_path)
+        tgt, tgt_index = refresh_target(target_path, text)
+    except Exception as e:
+        result.update(passed=False, error=str(e))
+        return result
+    missing, extra = diff_keys(template_data, tgt)
+    inline_problems = compare_inline_format(template_data, tgt, template_formats)
+    passed, report = build_report(
+        template_path, target_path,
+        [(k, format_location(template_index, k)) for k in missing],
+        [(k, format_location(tgt_index, k)) for k in extra],
+        [(p, format_location(template_index, p.split(":")[0])) for p in inline_problems])
+    result.update(passed=passed, missing=missing, extra=extra, problems=inline_problems, report=report)
+    return result
+
+def handle_request(line: str) -> Dict[str, Any]:
+    """
+    One request per line: a bare file path, or {"file": path, "text"?: unsaved content} / {"cmd": "ping"}.
+    Editing a template re-checks every target in its domain.
+    """
+    started = time.perf_counter()
+    line = line.strip()
+    try:
+        request = json.loads(line) if line.startswith("{") else {"file": line}
+    except ValueError as e:
+        return {"ok": False, "error": f"bad request: {e}"}
+    if not isinstance(request, dict):
+        return {"ok": False, "error": "bad request: expected a JSON object or a file path"}
+    if request.get("cmd") == "ping":
+        return {"ok": True}
+    if not request.get("file") or not isinstance(request["file"], str):
+        return {"ok": False, "error": "request needs a file path string"}
+    if request.get("text") is not None and not isinstance(request["text"], str):
+        return {"ok": False, "error": "text must be a string"}
+
+    file_path = Path(request["file"]).resolve()
+    template_path = template_for(file_path)
+    if template_path is None:
+        return {"ok": False, "file": str(file_path), "error": f"no {TEMPLATE_LOCALE} template next to this file"}
+    with _SERVER_LOCK:
+        if str(file_path) == template_path:
+            results = [validate_target(template_path, target) for target in find_locale_files(template_path)]
+        else:
+            results = [validate_target(template_path, str(file_path), request.get("text"))]
+    return {
+        "ok": True,
+        "file": str(file_path),
+        "passed": all(r["passed"] for r in results),
+        "results": results,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+def respond(line: str) -> str:
+    """handle_request as one JSON line; any failure becomes an error reply so the server keeps running."""
+    try:
+        response = handle_request(line)
+    except Exception as e:
+        response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return json.dumps(response, ensure_ascii=False)
+
+def watch_locale_data(data_root: str, interval: float):
+    """Poll every domain's JSON files and reload the ones that changed, so requests find warm caches."""
+    seen: Dict[str, float] = {}
+    while True:
+        for _, template_path in find_domains(data_root):
+            for path in [template_path] + find_locale_files(template_path):
+                path = str(Path(path).resolve())
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                if seen.get(path) == mtime:
+                    continue
+                first = path not in seen
+                seen[path] = mtime
+                with _SERVER_LOCK:
+                    try:
+                        if template_for(Path(path)) == path:
+                            refresh_template(path)
+                        else:
+                            refresh_target(path)
+                    except Exception as e:
+                        log(f"⚠️  Could not load {path}: {e}")
+                        continue
+                if not first:
+                    log(f"🔄 Reloaded {path}")
+        time.sleep(interval)
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode("utf-8", errors="replace")
+            if line.strip():
+                self.wfile.write((respond(line) + "\n").encode("utf-8"))
+
+def serve(data_root: str, port: Optional[int], interval: float) -> int:
+    watcher = threading.Thread(target=watch_locale_data, args=(data_root, interval), daemon=True)
+    watcher.start()
+    if port is not None:
+        socketserver.TCPServer.allow_reuse_address = True
+        with socketserver.TCPServer(("127.0.0.1", port), _RequestHandler) as server:
+            log(f"👂 Serving schema checks on 127.0.0.1:{server.server_address[1]}, watching {data_root}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return 0
+    log(f"👂 Reading schema check requests from stdin, watching {data_root}")
+    for line in sys.stdin:
+        if line.strip():
+            print(respond(line), flush=True)
+    return 0
 
 def main(argv=None):
     parser = argparse.ArgumentParser(
@@ -285,9 +1124,27 @@ Examples:
   Batch mode (check all locale files in same directory):
     python schema.py --template zh-CN.json --batch
     python schema.py --template zh-CN.json --batch --fix --report-dir reports
+
+  All domains (ui, game, region under src/locale/data, in parallel):
+    python schema.py --all-domains
+    python schema.py --all-domains -j 4 --report-dir reports
+
+  Incremental (re-check only sections changed since the last run, e.g. in pre-commit):
+    python schema.py --all-domains --incremental
+
+  Coverage matrix (key x locale status as CSV or JSON, by output suffix):
+    python schema.py --all-domains --matrix reports/coverage.csv
+    python schema.py --template zh-CN.json --matrix coverage.json
+
+  Server (keeps everything parsed; one JSON request per line, e.g. {"file": "ui/en-US.json"}):
+    python schema.py --serve
+    python schema.py --serve --port 8765
+
+  Streaming (bounded memory for very large locale files; no --fix / --incremental):
+    python schema.py --template zh-cn.json --batch --stream
         """
     )
-    parser.add_argument("--template", required=True, help="template JSON file (e.g. zh-CN.json)")
+    parser.add_argument("--template", help="template JSON file (e.g. zh-CN.json)")
     parser.add_argument("--target", help="target JSON file to check/fix (e.g. en-US.json)")
     parser.add_argument("--batch", action="store_true", 
                        help="batch mode: check all JSON files in template's directory (excluding template itself)")
@@ -295,14 +1152,102 @@ Examples:
                        help="write fixed target file(s) with keys ordered like template")
     parser.add_argument("--report", help="write textual report to this path (single file mode)")
     parser.add_argument("--report-dir", help="write reports to this directory (batch mode)")
+    parser.add_argument("--all-domains", action="store_true",
+                       help=f"batch-check every domain under --data-root against its {TEMPLATE_LOCALE} template")
+    parser.add_argument("--data-root", default=str(DEFAULT_DATA_ROOT),
+                       help="directory holding one sub-directory per locale domain (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                       help="worker processes for batch modes (default: one per CPU when at least "
+                            f"{MIN_PARALLEL_JOBS} files need parsing, otherwise none)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="batch modes: replay cached verdicts for unchanged files and top-level sections")
+    parser.add_argument("--cache-file", type=Path, default=None,
+                       help="verdict cache for --incremental (default: talos/node_modules/.cache/i18n-schema.json)")
+    parser.add_argument("--stream", action="store_true",
+                       help="stream files through an incremental JSON parser instead of loading them whole")
+    parser.add_argument("--matrix", type=Path,
+                       help="write the key x locale coverage matrix for the template's domain "
+                            "(or every domain with --all-domains) to this .csv/.json file and exit")
+    parser.add_argument("--serve", action="store_true",
+                       help="keep running: watch --data-root and answer check requests on stdin")
+    parser.add_argument("--port", type=int,
+                       help="with --serve, listen on this localhost TCP port instead of stdin (0 picks one)")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL,
+                       help="with --serve, seconds between file change scans (default: %(default)s)")
     args = parser.parse_args(argv)
 
-    # Load template
-    try:
-        tpl, tpl_text = load_file(args.template)
-    except Exception as e:
-        print(f"❌ Error loading template {args.template}: {e}")
+    if args.serve:
+        return serve(args.data_root, args.port, args.poll)
+
+    if args.matrix:
+        if args.all_domains:
+            domain_templates = find_domains(args.data_root)
+        elif args.template:
+            domain_templates = [(Path(args.template).parent.name, args.template)]
+        else:
+            print("❌ Error: --matrix needs --template or --all-domains")
+            return 1
+        domains = {domain: build_coverage_matrix(template_path) for domain, template_path in domain_templates}
+        write_coverage_matrix(args.matrix, domains)
+        print_coverage_summary(domains)
+        print(f"\n✅ Coverage matrix written to {args.matrix}")
+        return 0
+
+    if args.stream and (args.fix or args.incremental):
+        print("❌ Error: --stream cannot be combined with --fix or --incremental")
         return 1
+    worker = stream_check_target_job if args.stream else check_target_job
+
+    cache = None
+    if args.incremental:
+        args.cache_file = args.cache_file or default_cache_path()
+        cache = load_schema_cache(args.cache_file)
+
+    # Create report directory if needed
+    report_dir = None
+    if args.report_dir:
+        report_dir = Path(args.report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.all_domains:
+        domains = find_domains(args.data_root)
+        if not domains:
+            print(f"⚠️  No locale domains with a {TEMPLATE_LOCALE} template found in {args.data_root}")
+            return 0
+
+        jobs = []
+        for domain, template_path in domains:
+            locale_files = find_locale_files(template_path)
+            print(f"📦 {domain}: {len(locale_files)} locale file(s) against {template_path}")
+            for target_file in locale_files:
+                report_path = None
+                if report_dir:
+                    report_path = str(report_dir / f"{domain}_{Path(target_file).stem}_report.txt")
+                jobs.append((template_path, target_file, args.fix, report_path,
+                             cached_entry(cache, target_file)))
+
+        all_passed, entries = run_target_jobs(jobs, args.jobs, worker)
+        if cache is not None:
+            update_schema_cache(args.cache_file, cache, entries)
+
+        print("\n" + "="*80)
+        if all_passed:
+            print(f"✅ All {len(jobs)} locale files in {len(domains)} domain(s) passed validation!")
+        else:
+            print("❌ Some locale files have issues. Check reports above.")
+        return 0 if all_passed else 1
+
+    if not args.template:
+        print("❌ Error: --template is required (or use --all-domains)")
+        return 1
+
+    # Load template (streaming loads its own shape per worker)
+    if not args.stream:
+        try:
+            tpl, tpl_index, _ = load_template(args.template)
+        except Exception as e:
+            print(f"❌ Error loading template {args.template}: {e}")
+            return 1
 
     if args.batch:
         # Batch mode: process all locale files
@@ -317,23 +1262,19 @@ Examples:
         for f in locale_files:
             print(f"  - {f}")
         
-        # Create report directory if needed
-        report_dir = None
-        if args.report_dir:
-            report_dir = Path(args.report_dir)
-            report_dir.mkdir(parents=True, exist_ok=True)
-        
         # Process each file
-        all_passed = True
+        jobs = []
         for target_file in locale_files:
             target_name = Path(target_file).stem
             report_path = None
             if report_dir:
                 report_path = str(report_dir / f"{target_name}_report.txt")
-            
-            passed = process_single_target(tpl, tpl_text, args.template, target_file, 
-                                          args.fix, report_path)
-            all_passed = all_passed and passed
+            jobs.append((args.template, target_file, args.fix, report_path,
+                         cached_entry(cache, target_file)))
+
+        all_passed, entries = run_target_jobs(jobs, args.jobs, worker)
+        if cache is not None:
+            update_schema_cache(args.cache_file, cache, entries)
         
         print("\n" + "="*80)
         if all_passed:
@@ -349,7 +1290,12 @@ Examples:
             print("❌ Error: --target is required in single file mode (or use --batch)")
             return 1
         
-        passed = process_single_target(tpl, tpl_text, args.template, args.target, 
+        if args.stream:
+            passed, output, _ = stream_check_target(args.template, args.target, args.report)
+            print(output)
+            return 0 if passed else 1
+
+        passed = process_single_target(tpl, tpl_index, args.template, args.target, 
                                       args.fix, args.report)
         return 0 if passed else 1
 
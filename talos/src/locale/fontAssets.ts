@@ -11,15 +11,33 @@ const normalizeRelPath = (p: string): string => {
 
 // Eagerly collect available font assets at build-time.
 // If some font files are missing in the repo/CI, they simply won't appear here (no hard build failure).
+// Unicode-range shards (<font>.sNN.woff2) and region base/delta slices (subset-fonts.py --shards /
+// --region-deltas) repeat the full fonts' glyphs, so they stay out of the eager set and load on demand.
 const fontAssetUrlModules = import.meta.glob(
-    '../assets/fonts/**/*.{woff2,woff,otf,ttf}',
+    [
+        '../assets/fonts/**/*.{woff2,woff,otf,ttf}',
+        '!../assets/fonts/**/*.s[0-9][0-9].woff2',
+        '!../assets/fonts/UD_ShinGo/UDShinGo_{base,delta}_*.woff2',
+    ],
     { eager: true, query: '?url', import: 'default' }
 ) as UrlModuleMap;
 
+const fontSliceUrlLoaders = import.meta.glob(
+    [
+        '../assets/fonts/**/*.s[0-9][0-9].woff2',
+        '../assets/fonts/UD_ShinGo/UDShinGo_{base,delta}_*.woff2',
+    ],
+    { query: '?url', import: 'default' }
+) as Record<string, () => Promise<string>>;
+
 const FONT_ASSET_URLS: Record<string, string> = Object.fromEntries(
     Object.entries(fontAssetUrlModules).map(([path, url]) => [normalizeRelPath(path), url])
 );
 
+const FONT_SLICE_URL_LOADERS: Record<string, () => Promise<string>> = Object.fromEntries(
+    Object.entries(fontSliceUrlLoaders).map(([path, load]) => [normalizeRelPath(path), load])
+);
+
 export const getFontAssetUrl = (relPath: string): string | undefined => {
     return FONT_ASSET_URLS[relPath];
 };
@@ -31,4 +49,10 @@ export const getFontAssetUrls = (relPaths: string[]): string[] => {
         if (url) urls.push(url);
     }
     return urls;
+};
+
+// Shard and region delta files (see shards.json / locales.json), resolved only when requested.
+export const loadFontSliceUrl = async (relPath: string): Promise<string | undefined> => {
+    const load = FONT_SLICE_URL_LOADERS[relPath];
+    return load ? load() : undefined;
 };
\ No newline at end of file